@@ -4,11 +4,15 @@ import numpy as np
 from geopy.distance import geodesic
 import folium
 from streamlit_folium import st_folium
-from data.hospitals import HOSPITALS_DATA, get_hospitals_by_location
+from data.hospitals import get_hospital_store
 from data.locations import INDIAN_LOCATIONS, get_coordinates
 from data.conditions import MEDICAL_CONDITIONS, get_condition_specialties
-from utils.distance import calculate_distance
-from utils.ai_matcher import match_hospitals_to_condition
+from utils.ai_matcher import materialize_rankings, pack_rankings, prepare_store, rank_hospitals
+from utils.geocache import normalize_location_key
+from utils.metrics import (
+    METRICS_FILE, finish_trace, metrics_enabled, start_timer, start_trace,
+    write_prometheus_textfile
+)
 
 # Page configuration
 st.set_page_config(
@@ -18,11 +22,66 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize session state
+@st.cache_resource
+def load_hospital_store():
+    """
+    Load the hospital data with its indexes and precomputed score vectors
+    once per process; every session shares this read-only store.
+    """
+    store = get_hospital_store()
+    prepare_store(store)
+    return store
+
+hospital_store = load_hospital_store()
+
+# Stage times and counters of this rerun, collected while metrics are enabled
+rerun_trace = start_trace("rerun") if metrics_enabled() else None
+
+# Searches finding fewer hospitals than this widen their radius automatically;
+# only searches that find nothing at all, since the bundled data is sparse
+MIN_SEARCH_RESULTS = 1
+
+@st.cache_data(show_spinner=False, ttl=600, max_entries=1000)
+def search_hospitals(condition, user_coords, hospital_types, min_rating, max_distance):
+    """
+    Run a hospital search, cached on its normalized parameters so repeated
+    searches from any session are served without re-running the matcher.
+    Searches are keyed on the geocoded coordinates, so a location is only
+    searched once it has been geocoded.
+    
+    In sparse areas the search radius is widened until at least
+    MIN_SEARCH_RESULTS hospitals qualify.
+    
+    Returns:
+        Compact arrays (store rows, distances and scores) for the top 20
+        hospitals by AI score and rating, plus the requested 'max_distance'
+        and the 'radius_used'
+    """
+    # Rank hospitals within distance by AI score and rating
+    stats = {}
+    rankings = rank_hospitals(
+        condition,
+        user_coords,
+        list(hospital_types),
+        min_rating,
+        max_distance,
+        load_hospital_store(),
+        top_k=20,  # Top 20 results
+        stats=stats,
+        min_results=MIN_SEARCH_RESULTS
+    )
+    
+    results = pack_rankings(rankings)
+    results['max_distance'] = max_distance
+    results['radius_used'] = stats['radius_used']
+    return results
+
+# Initialize session state; results are kept as store rows plus per-query
+# score arrays, and the selected hospital as a position in those results
 if 'selected_hospital' not in st.session_state:
     st.session_state.selected_hospital = None
 if 'search_results' not in st.session_state:
-    st.session_state.search_results = []
+    st.session_state.search_results = None
 if 'search_performed' not in st.session_state:
     st.session_state.search_performed = False
 
@@ -98,44 +157,53 @@ search_clicked = st.sidebar.button("🔍 Search Hospitals", type="primary")
 # Main content area
 col1, col2 = st.columns([1, 1])
 
-if search_clicked or st.session_state.search_results:
+# Resolve the search location once per rerun, only when results are shown
+location_key = normalize_location_key(search_location)
+user_coords = None
+if search_clicked or st.session_state.search_results is not None:
+    user_coords = get_coordinates(location_key)
+
+# Hospital records are only built here, for rendering this rerun
+search_results = []
+
+if search_clicked or st.session_state.search_results is not None:
     if search_clicked:
         st.session_state.search_performed = True
-        # Get user coordinates
-        user_coords = get_coordinates(search_location)
+        st.session_state.selected_hospital = None
         
         if user_coords:
-            # Get relevant hospitals based on location and condition
-            matched_hospitals = match_hospitals_to_condition(
-                specific_condition, 
-                search_location, 
-                hospital_type,
-                min_rating,
-                max_distance
+            search_timer = start_timer("search")
+            results = search_hospitals(
+                specific_condition,
+                tuple(user_coords),
+                tuple(sorted(hospital_type)),
+                float(min_rating),
+                float(max_distance)
             )
-            
-            # Calculate distances and sort
-            for hospital in matched_hospitals:
-                hospital_coords = (hospital['latitude'], hospital['longitude'])
-                distance = calculate_distance(user_coords, hospital_coords)
-                hospital['distance'] = distance
-            
-            # Filter by distance and sort by AI score and rating
-            filtered_hospitals = [h for h in matched_hospitals if h['distance'] <= max_distance]
-            filtered_hospitals.sort(key=lambda x: (x.get('ai_score', 0), x['rating']), reverse=True)
-            
-            st.session_state.search_results = filtered_hospitals[:20]  # Top 20 results
+            search_timer.stop()
+            has_results = len(results['row']) > 0
+            st.session_state.search_results = results if has_results else None
         else:
             st.error("Could not find coordinates for the specified location. Please try a different location.")
+    
+    if st.session_state.search_results is not None:
+        with start_timer("materialize"):
+            search_results = materialize_rankings(st.session_state.search_results, hospital_store)
 
     # Display results
-    if st.session_state.search_results:
+    if search_results:
+        results_timer = start_timer("render_results")
         with col1:
             st.subheader("🏥 Hospital Results")
-            st.write(f"Found {len(st.session_state.search_results)} hospitals for **{specific_condition}** near **{search_location}**")
+            st.write(f"Found {len(search_results)} hospitals for **{specific_condition}** near **{search_location}**")
+            # Compare with the radius searched, as the slider may have moved since
+            searched_distance = st.session_state.search_results['max_distance']
+            radius_used = st.session_state.search_results['radius_used']
+            if radius_used > searched_distance:
+                st.info(f"No hospitals within {searched_distance:g} km, so the search was widened to {radius_used:g} km")
             
             # Display hospital cards
-            for idx, hospital in enumerate(st.session_state.search_results):
+            for idx, hospital in enumerate(search_results):
                 with st.container():
                     # Hospital card
                     card_container = st.container()
@@ -164,27 +232,27 @@ if search_clicked or st.session_state.search_results:
                     
                     # Select hospital button
                     if st.button(f"View Details", key=f"select_{idx}"):
-                        st.session_state.selected_hospital = hospital
+                        st.session_state.selected_hospital = idx
                         st.rerun()
                     
                     st.divider()
+        results_timer.stop()
         
         with col2:
             st.subheader("🗺️ Map View")
+            map_timer = start_timer("render_map")
             
             # Create map centered on user location or selected hospital
-            if st.session_state.selected_hospital:
-                center_lat = st.session_state.selected_hospital['latitude']
-                center_lon = st.session_state.selected_hospital['longitude']
+            if st.session_state.selected_hospital is not None:
+                center_lat = search_results[st.session_state.selected_hospital]['latitude']
+                center_lon = search_results[st.session_state.selected_hospital]['longitude']
                 zoom_level = 13
+            elif user_coords:
+                center_lat, center_lon = user_coords
+                zoom_level = 11
             else:
-                user_coords = get_coordinates(search_location)
-                if user_coords:
-                    center_lat, center_lon = user_coords
-                    zoom_level = 11
-                else:
-                    center_lat, center_lon = 28.6139, 77.2090  # Default to Delhi
-                    zoom_level = 10
+                center_lat, center_lon = 28.6139, 77.2090  # Default to Delhi
+                zoom_level = 10
             
             # Create folium map
             m = folium.Map(
@@ -194,7 +262,6 @@ if search_clicked or st.session_state.search_results:
             )
             
             # Add user location marker
-            user_coords = get_coordinates(search_location)
             if user_coords:
                 folium.Marker(
                     user_coords,
@@ -203,7 +270,7 @@ if search_clicked or st.session_state.search_results:
                 ).add_to(m)
             
             # Add hospital markers
-            for hospital in st.session_state.search_results[:10]:  # Show top 10 on map
+            for hospital in search_results[:10]:  # Show top 10 on map
                 color = 'green' if hospital.get('nabh_accredited') else 'blue'
                 icon = 'plus' if hospital['type'] == 'Government' else 'hospital-o'
                 
@@ -220,13 +287,16 @@ if search_clicked or st.session_state.search_results:
                     icon=folium.Icon(color=color, icon=icon, prefix='fa')
                 ).add_to(m)
             
+            map_timer.stop()
+            
             # Display map
-            map_data = st_folium(m, width=500, height=400)
+            with start_timer("render_map_widget"):
+                map_data = st_folium(m, width=500, height=400)
 
 # Hospital details section
-if st.session_state.selected_hospital:
+if st.session_state.selected_hospital is not None and st.session_state.selected_hospital < len(search_results):
     st.markdown("---")
-    hospital = st.session_state.selected_hospital
+    hospital = search_results[st.session_state.selected_hospital]
     
     st.subheader(f"🏥 {hospital['name']}")
     
@@ -398,7 +468,6 @@ if st.session_state.selected_hospital:
     
     with tab5:
         st.write("**Directions**")
-        user_coords = get_coordinates(search_location)
         if user_coords:
             st.write(f"**From:** {search_location}")
             st.write(f"**To:** {hospital['name']}")
@@ -440,3 +509,11 @@ elif not st.session_state.search_performed:
     
     **Get started by filling in your search criteria in the sidebar!**
     """)
+
+# Publish this rerun's timings; reruns cut short by st.rerun() are not reported
+if rerun_trace is not None:
+    finish_trace(rerun_trace)
+    with st.sidebar.expander("⏱️ Timings"):
+        st.json(rerun_trace)
+    if METRICS_FILE:
+        write_prometheus_textfile(METRICS_FILE)
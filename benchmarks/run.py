@@ -0,0 +1,308 @@
+"""
+Benchmarks for the search hot paths on synthetic hospital registries.
+
+Times each hot path per registry size and writes p50/p95 latency, throughput
+and peak traced memory to a JSON file, which can be compared with an earlier
+run. From the repository root:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sizes 1000 10000 --compare results.json
+"""
+
+import os
+
+# Geocoding must not leave the machine or be throttled: network lookups go to
+# StubGeocoder, without request spacing and with an in-memory cache. These are
+# read when data.locations is imported, so they are set before any import.
+os.environ['HOSPITAL_FINDER_OFFLINE'] = '0'
+os.environ['NOMINATIM_MIN_INTERVAL'] = '0'
+os.environ['HOSPITAL_FINDER_GEOCACHE_PATH'] = ''
+
+import argparse
+import csv
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import zlib
+from collections import namedtuple
+import numpy as np
+from benchmarks.synthetic import INDIA_BOUNDS, generate_hospitals
+from data.conditions import MEDICAL_CONDITIONS, get_condition_specialties
+from data.hospitals import get_hospital_store, reload_hospitals
+from data.locations import CITY_COORDINATES, get_coordinates, set_geocode_cache, set_geocoder
+from data.pincodes import DEFAULT_PINCODE_CSV
+from utils.ai_matcher import (
+    get_hospital_recommendations, get_spatial_index, match_hospitals_to_condition
+)
+from utils.distance import find_nearest_hospitals
+from utils.geocache import GeocodeCache
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_CALLS = 200
+DEFAULT_SEED = 0
+
+# Untimed calls before each benchmark, so one-off caches are filled
+WARMUP_CALLS = 5
+
+# Calls traced for peak memory; tracing slows calls down, so it runs apart
+# from the timed calls
+MEMORY_CALLS = 5
+
+# Search radii used by the distance and matching benchmarks, in kilometers
+RADII_KM = [10, 25, 50, 100]
+
+# Relative p50 change reported as a regression or improvement by --compare
+COMPARE_THRESHOLD = 0.1
+
+Location = namedtuple('Location', ['latitude', 'longitude'])
+
+
+class StubGeocoder:
+    """
+    Local stand-in for Nominatim.
+
+    Answers every query instantly with coordinates inside India derived from
+    the query text, so repeated runs geocode identically.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def geocode(self, query, timeout=None):
+        self.calls += 1
+        digest = zlib.crc32(query.encode('utf-8'))
+        lat_span = INDIA_BOUNDS['lat_max'] - INDIA_BOUNDS['lat_min']
+        lng_span = INDIA_BOUNDS['lng_max'] - INDIA_BOUNDS['lng_min']
+        return Location(
+            INDIA_BOUNDS['lat_min'] + lat_span * (digest % 10007) / 10007,
+            INDIA_BOUNDS['lng_min'] + lng_span * (digest // 10007 % 10007) / 10007
+        )
+
+
+def _load_pincodes():
+    """Get the PIN codes of the offline geocoder's centroid file"""
+    with open(DEFAULT_PINCODE_CSV, newline='', encoding='utf-8') as f:
+        rows = csv.DictReader(line for line in f if not line.startswith('#'))
+        return [row['pincode'] for row in rows]
+
+
+def build_workload(calls, seed=DEFAULT_SEED):
+    """
+    Build the deterministic queries of the benchmarks.
+
+    Every benchmark call, including warmup and memory tracing calls, gets
+    its own query number, so uncached lookups stay uncached.
+
+    Returns:
+        Dictionary of query lists: 'conditions', 'free_text', 'cities',
+        'coordinates', 'radii', 'local_locations' and 'geocoded_locations'
+    """
+    rng = random.Random(seed)
+    calls += WARMUP_CALLS + MEMORY_CALLS
+    conditions = sorted({c for group in MEDICAL_CONDITIONS.values() for c in group})
+    cities = sorted(name.title() for name in CITY_COORDINATES)
+    local_locations = cities + _load_pincodes()
+
+    return {
+        'conditions': [rng.choice(conditions) for _ in range(calls)],
+        'free_text': [
+            f"{rng.choice(conditions).lower()} for {rng.randint(1, 30)} days" for _ in range(calls)
+        ],
+        'cities': [rng.choice(cities) for _ in range(calls)],
+        'coordinates': [
+            CITY_COORDINATES[rng.choice(cities).lower()] for _ in range(calls)
+        ],
+        'radii': [rng.choice(RADII_KM) for _ in range(calls)],
+        'local_locations': [rng.choice(local_locations) for _ in range(calls)],
+        # Unique, so each one misses the cache and reaches the geocoder
+        'geocoded_locations': [f"Synthetic Locality {seed}-{i}" for i in range(calls)]
+    }
+
+
+def _registry_benchmarks(workload, hospitals, index):
+    """Benchmarks whose cost depends on the registry size, as (name, call(i))"""
+    return [
+        ('find_nearest_hospitals', lambda i: find_nearest_hospitals(
+            workload['coordinates'][i], hospitals, workload['radii'][i], index=index
+        )),
+        ('match_hospitals_to_condition', lambda i: match_hospitals_to_condition(
+            workload['conditions'][i], workload['cities'][i], ['Government', 'Private'],
+            3.0, workload['radii'][i], top_k=20
+        )),
+        ('get_hospital_recommendations', lambda i: get_hospital_recommendations(
+            workload['conditions'][i], workload['cities'][i]
+        ))
+    ]
+
+
+def _lookup_benchmarks(workload):
+    """Benchmarks that do not touch the hospital registry, as (name, call(i))"""
+    return [
+        ('get_condition_specialties', lambda i: get_condition_specialties(
+            workload['conditions'][i]
+        )),
+        ('get_condition_specialties[free_text]', lambda i: get_condition_specialties(
+            workload['free_text'][i]
+        )),
+        ('get_coordinates[local]', lambda i: get_coordinates(workload['local_locations'][i])),
+        ('get_coordinates[geocoder]', lambda i: get_coordinates(
+            workload['geocoded_locations'][i]
+        ))
+    ]
+
+
+def measure(name, call, calls, rows=None):
+    """
+    Time a benchmark and trace its peak memory.
+
+    Args:
+        name: Benchmark name
+        call: Function taking the query number
+        calls: Number of timed calls (the workload holds WARMUP_CALLS and
+            MEMORY_CALLS more queries)
+        rows: Registry size, or None for benchmarks independent of it
+
+    Returns:
+        Result dictionary for the report
+    """
+    # Query numbers: timed calls first, then warmup and memory tracing calls
+    for i in range(calls, calls + WARMUP_CALLS):
+        call(i)
+
+    latencies = np.empty(calls)
+    started = time.perf_counter()
+    for i in range(calls):
+        call_started = time.perf_counter()
+        call(i)
+        latencies[i] = time.perf_counter() - call_started
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for i in range(calls + WARMUP_CALLS, calls + WARMUP_CALLS + MEMORY_CALLS):
+            call(i)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'name': name,
+        'rows': rows,
+        'calls': calls,
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 4),
+        'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 4),
+        'mean_ms': round(float(latencies.mean()) * 1000, 4),
+        'throughput_per_s': round(calls / elapsed, 2),
+        'peak_memory_bytes': int(peak)
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, calls=DEFAULT_CALLS, seed=DEFAULT_SEED, log=print):
+    """
+    Run every benchmark.
+
+    Args:
+        sizes: Synthetic registry sizes to benchmark
+        calls: Timed calls per benchmark
+        seed: Seed for the registry and the queries
+        log: Function receiving progress messages
+
+    Returns:
+        Report dictionary with the environment, per-size setup times and
+        the benchmark results
+    """
+    workload = build_workload(calls, seed)
+    geocoder = StubGeocoder()
+    set_geocoder(geocoder)
+    set_geocode_cache(GeocodeCache())
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': seed,
+        'setup': [],
+        'results': []
+    }
+
+    for name, call in _lookup_benchmarks(workload):
+        log(f"{name}")
+        report['results'].append(measure(name, call, calls))
+    report['stub_geocoder_calls'] = geocoder.calls
+
+    for size in sizes:
+        started = time.perf_counter()
+        hospitals = generate_hospitals(size, seed)
+        generated = time.perf_counter()
+        reload_hospitals(hospitals)
+        loaded = time.perf_counter()
+        report['setup'].append({
+            'rows': size,
+            'generate_s': round(generated - started, 3),
+            'load_s': round(loaded - generated, 3)
+        })
+
+        index = get_spatial_index(get_hospital_store())
+        for name, call in _registry_benchmarks(workload, hospitals, index):
+            log(f"{name} ({size} rows)")
+            report['results'].append(measure(name, call, calls, size))
+
+    return report
+
+
+def compare_reports(baseline, current, threshold=COMPARE_THRESHOLD):
+    """
+    Compare the p50 latencies of two reports.
+
+    Returns:
+        List of lines describing each benchmark found in both reports
+    """
+    previous = {(r['name'], r['rows']): r for r in baseline['results']}
+    lines = []
+    for result in current['results']:
+        before = previous.get((result['name'], result['rows']))
+        if before is None or before['p50_ms'] <= 0:
+            continue
+        change = result['p50_ms'] / before['p50_ms'] - 1
+        verdict = 'slower' if change > threshold else 'faster' if change < -threshold else 'same'
+        rows = '' if result['rows'] is None else f" ({result['rows']} rows)"
+        lines.append(
+            f"{result['name']}{rows}: {before['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms "
+            f"p50 ({change:+.1%}, {verdict})"
+        )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='synthetic registry sizes')
+    parser.add_argument('--calls', type=int, default=DEFAULT_CALLS,
+                        help='timed calls per benchmark')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='JSON report to write')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='earlier JSON report to compare against')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.calls, args.seed,
+                            log=lambda message: print(message, file=sys.stderr))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for line in compare_reports(baseline, report):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
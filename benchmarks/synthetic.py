@@ -0,0 +1,120 @@
+"""
+Deterministic synthetic hospital registries for benchmarking.
+Hospitals cluster around the known Indian cities, with a share scattered over
+the country, and draw their specialties from a fixed set of hospital profiles
+so that large registries repeat specialty mixes the way real ones do.
+"""
+
+import random
+from data.conditions import CONDITION_TO_SPECIALTY
+from data.hospitals import HOSPITALS_DATA
+from data.locations import CITY_COORDINATES, INDIAN_LOCATIONS
+
+# Bounding box of mainland India (latitude and longitude ranges)
+INDIA_BOUNDS = {
+    'lat_min': 8.0,
+    'lat_max': 35.5,
+    'lng_min': 68.5,
+    'lng_max': 97.0
+}
+
+# Share of hospitals placed away from any city
+RURAL_SHARE = 0.15
+
+# Spread of hospitals around a city center, in degrees (about 20 km)
+CITY_SPREAD_DEGREES = 0.18
+
+# Number of distinct specialty profiles hospitals are drawn from
+PROFILE_COUNT = 400
+
+HOSPITAL_TYPES = ['Government', 'Private']
+INSURANCE_SCHEMES = sorted({
+    scheme for hospital in HOSPITALS_DATA for scheme in hospital['insurance_accepted']
+})
+
+
+def _known_cities():
+    """
+    Get the listed cities with known coordinates.
+
+    Returns:
+        Tuple of a list of (city, state, coordinates) and their weights;
+        larger cities (listed first in each state) get more hospitals
+    """
+    cities = []
+    weights = []
+    for state, names in INDIAN_LOCATIONS.items():
+        for rank, name in enumerate(names):
+            coords = CITY_COORDINATES.get(name.lower())
+            if coords:
+                cities.append((name, state, coords))
+                weights.append(1.0 / (1 + rank))
+    return cities, weights
+
+
+def _specialty_profiles(rng):
+    """Build the specialty lists hospitals are drawn from"""
+    # Specialties weighted by how many conditions need them
+    weighted = [s for specialties in CONDITION_TO_SPECIALTY.values() for s in specialties]
+    weighted += [s for hospital in HOSPITALS_DATA for s in hospital['specialties']]
+
+    profiles = [hospital['specialties'] for hospital in HOSPITALS_DATA]
+    while len(profiles) < PROFILE_COUNT:
+        profile = []
+        for _ in range(rng.randint(2, 9)):
+            specialty = rng.choice(weighted)
+            if specialty not in profile:
+                profile.append(specialty)
+        profiles.append(profile)
+    return profiles
+
+
+def generate_hospitals(count, seed=0):
+    """
+    Generate a synthetic hospital registry.
+
+    The same count and seed always give the same hospitals.
+
+    Args:
+        count: Number of hospitals
+        seed: Random seed
+
+    Returns:
+        List of hospital dictionaries with the fields of HOSPITALS_DATA
+    """
+    rng = random.Random(seed)
+    cities, city_weights = _known_cities()
+    profiles = _specialty_profiles(rng)
+
+    hospitals = []
+    for i in range(count):
+        city, state, (lat, lng) = rng.choices(cities, weights=city_weights)[0]
+        if rng.random() < RURAL_SHARE:
+            lat = rng.uniform(INDIA_BOUNDS['lat_min'], INDIA_BOUNDS['lat_max'])
+            lng = rng.uniform(INDIA_BOUNDS['lng_min'], INDIA_BOUNDS['lng_max'])
+        else:
+            lat = min(max(rng.gauss(lat, CITY_SPREAD_DEGREES), INDIA_BOUNDS['lat_min']),
+                      INDIA_BOUNDS['lat_max'])
+            lng = min(max(rng.gauss(lng, CITY_SPREAD_DEGREES), INDIA_BOUNDS['lng_min']),
+                      INDIA_BOUNDS['lng_max'])
+
+        hospital_type = rng.choice(HOSPITAL_TYPES)
+        rating = round(min(max(rng.gauss(4.0, 0.45), 1.0), 5.0), 1)
+        hospitals.append({
+            "name": f"Synthetic {hospital_type} Hospital {i}",
+            "address": f"Block {i % 97}, {city}",
+            "city": city,
+            "state": state,
+            "latitude": round(lat, 4),
+            "longitude": round(lng, 4),
+            "type": hospital_type,
+            "rating": rating,
+            "specialties": list(rng.choice(profiles)),
+            "nabh_accredited": rng.random() < (0.2 + 0.15 * (rating - 3)),
+            "emergency_services": rng.random() < 0.7,
+            "insurance_accepted": rng.sample(INSURANCE_SCHEMES, rng.randint(1, 6)),
+            "phone": f"+91-{rng.randint(10, 99)}-{rng.randint(10000000, 99999999)}",
+            "website": f"https://hospital{i}.example.in"
+        })
+
+    return hospitals
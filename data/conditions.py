@@ -3,6 +3,10 @@ Medical conditions and specialties common in Indian healthcare context.
 Organized by categories with mapping to hospital specialties.
 """
 
+import os
+from collections import deque
+from functools import lru_cache
+
 MEDICAL_CONDITIONS = {
     "Cardiovascular": [
         "Heart Attack (Myocardial Infarction)",
@@ -242,22 +246,116 @@ CONDITION_TO_SPECIALTY = {
     "severe bleeding": ["Emergency Medicine", "General Surgery"]
 }
 
-def get_condition_specialties(condition):
-    """Get relevant medical specialties for a given condition"""
-    condition_lower = condition.lower()
-    
+# Emergency vocabulary file, one keyword per line; the built-in list below is
+# used if it cannot be read
+DEFAULT_EMERGENCY_KEYWORDS_PATH = os.path.join(os.path.dirname(__file__), "emergency_keywords.txt")
+EMERGENCY_KEYWORDS_ENV = "HOSPITAL_FINDER_EMERGENCY_KEYWORDS"
+
+# Words and phrases that mark a condition as needing emergency care
+DEFAULT_EMERGENCY_KEYWORDS = [
+    "heart attack", "stroke", "severe", "emergency", "trauma", 
+    "accident", "bleeding", "poisoning", "burns", "difficulty breathing",
+    "loss of consciousness", "chest pain"
+]
+
+# Number of distinct free-text conditions whose specialties are memoized
+CONDITION_CACHE_SIZE = 4096
+
+class _KeywordAutomaton:
+    """
+    Aho-Corasick automaton that finds every keyword occurring in a text.
+
+    Matching is a single left-to-right pass over the text, independent of
+    the number of keywords.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].add(keyword)
+
+        # Breadth-first pass to set failure links and merge their outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """Get the set of keywords that occur anywhere in the text"""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found |= self._output[state]
+        return found
+
+def _normalize_condition(condition):
+    """Normalize a condition string for lookups"""
+    return " ".join(condition.lower().split())
+
+def _compile_condition_lookup(condition_to_specialty):
+    """
+    Compile the condition mapping into an exact-match table and a word index.
+
+    Returns:
+        Tuple of (exact table, word automaton, map of word to key positions)
+    """
+    exact_table = {}
+    keys_by_word = {}
+    for position, (key, specialties) in enumerate(condition_to_specialty.items()):
+        exact_table.setdefault(_normalize_condition(key), tuple(specialties))
+        for word in key.split():
+            keys_by_word.setdefault(word, []).append(position)
+    return exact_table, _KeywordAutomaton(keys_by_word), keys_by_word
+
+_CONDITION_EXACT, _CONDITION_WORDS, _CONDITION_KEYS_BY_WORD = _compile_condition_lookup(CONDITION_TO_SPECIALTY)
+_CONDITION_SPECIALTIES = [tuple(specs) for specs in CONDITION_TO_SPECIALTY.values()]
+
+@lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def _resolve_condition(condition_normalized):
+    """Resolve a normalized condition to a tuple of specialties"""
     # Look for exact matches first
-    if condition_lower in CONDITION_TO_SPECIALTY:
-        return CONDITION_TO_SPECIALTY[condition_lower]
+    if condition_normalized in _CONDITION_EXACT:
+        return _CONDITION_EXACT[condition_normalized]
     
-    # Look for partial matches
-    specialties = []
-    for key, specs in CONDITION_TO_SPECIALTY.items():
-        if any(word in condition_lower for word in key.split()):
-            specialties.extend(specs)
+    # Look for partial matches: any word of a known condition in the text
+    positions = set()
+    for word in _CONDITION_WORDS.find_all(condition_normalized):
+        positions.update(_CONDITION_KEYS_BY_WORD[word])
     
-    # Remove duplicates and return
-    return list(set(specialties)) if specialties else ["General Medicine"]
+    # Remove duplicates, keeping the order of the condition mapping
+    specialties = {}
+    for position in sorted(positions):
+        for specialty in _CONDITION_SPECIALTIES[position]:
+            specialties.setdefault(specialty, None)
+    
+    return tuple(specialties) if specialties else ("General Medicine",)
+
+def get_condition_specialties(condition):
+    """Get relevant medical specialties for a given condition"""
+    return list(_resolve_condition(_normalize_condition(condition)))
 
 def get_conditions_by_specialty(specialty):
     """Get conditions that can be treated by a given specialty"""
@@ -272,11 +370,49 @@ def get_conditions_by_specialty(specialty):
 
 def is_emergency_condition(condition):
     """Check if a condition requires emergency care"""
-    emergency_keywords = [
-        "heart attack", "stroke", "severe", "emergency", "trauma", 
-        "accident", "bleeding", "poisoning", "burns", "difficulty breathing",
-        "loss of consciousness", "chest pain"
-    ]
+    return _is_emergency(_normalize_condition(condition))
+
+@lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def _is_emergency(condition_normalized):
+    """Check a normalized condition against the compiled emergency keywords"""
+    return bool(_EMERGENCY_MATCHER.find_all(condition_normalized))
+
+def set_emergency_keywords(keywords):
+    """
+    Replace the emergency vocabulary and recompile its matcher.
+    
+    Args:
+        keywords: Iterable of keywords; a condition containing any of them
+            (case-insensitive) is treated as an emergency
+    """
+    global EMERGENCY_KEYWORDS, _EMERGENCY_MATCHER
+    EMERGENCY_KEYWORDS = [_normalize_condition(keyword) for keyword in keywords if keyword.strip()]
+    _EMERGENCY_MATCHER = _KeywordAutomaton(EMERGENCY_KEYWORDS)
+    _is_emergency.cache_clear()
+
+def load_emergency_keywords(path=None):
+    """
+    Load the emergency vocabulary from a text file with one keyword per line.
+    
+    Blank lines and lines starting with '#' are ignored. If the file cannot
+    be read, the current vocabulary is kept.
     
-    condition_lower = condition.lower()
-    return any(keyword in condition_lower for keyword in emergency_keywords)
+    Args:
+        path: Path to the keyword file (defaults to the configured file)
+    
+    Returns:
+        True if the vocabulary was loaded from the file
+    """
+    path = path or os.environ.get(EMERGENCY_KEYWORDS_ENV, DEFAULT_EMERGENCY_KEYWORDS_PATH)
+    try:
+        with open(path, encoding="utf-8") as keyword_file:
+            keywords = [line for line in keyword_file if not line.lstrip().startswith("#")]
+    except OSError as e:
+        print(f"Could not load emergency keywords from {path}: {e}")
+        return False
+    
+    set_emergency_keywords(keywords)
+    return True
+
+set_emergency_keywords(DEFAULT_EMERGENCY_KEYWORDS)
+load_emergency_keywords()
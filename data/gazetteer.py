@@ -0,0 +1,184 @@
+"""
+Offline gazetteer for resolving typed locations to coordinates.
+Built from the predefined city coordinates, the state/city lists and a
+loadable alias file (old names, common misspellings and Hindi spellings), so
+most manual inputs resolve without a network geocoding call.
+"""
+
+import json
+import os
+import re
+
+# Default alias file: {"canonical city": ["alias", ...]}
+DEFAULT_ALIASES_PATH = os.path.join(os.path.dirname(__file__), "location_aliases.json")
+
+# Minimum trigram similarity (0 to 1) for a fuzzy match to be accepted
+FUZZY_THRESHOLD = 0.55
+
+# Words too short to fuzzy-match reliably
+MIN_FUZZY_LENGTH = 4
+
+# Candidate scores from this value up are exact name matches
+EXACT_MATCH_SCORE = 1.0
+
+# Words that describe a place rather than name it
+NOISE_WORDS = {"district", "city", "india"}
+
+_SEPARATORS = re.compile(r"[\s,;:/()\[\].\-_]+")
+
+
+def tokenize_location(location_string):
+    """Split a location string into lower-case words, dropping noise words"""
+    return [
+        token for token in _SEPARATORS.split(location_string.lower())
+        if token and token not in NOISE_WORDS
+    ]
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_aliases(path=DEFAULT_ALIASES_PATH):
+    """
+    Load a location alias file.
+
+    Args:
+        path: JSON file mapping canonical city names to lists of aliases
+
+    Returns:
+        Dictionary of alias to canonical name, both lower-case; empty if the
+        file is missing or unreadable
+    """
+    try:
+        with open(path, encoding="utf-8") as alias_file:
+            canonical_to_aliases = json.load(alias_file)
+    except (OSError, ValueError) as e:
+        print(f"Could not load location aliases from {path}: {e}")
+        return {}
+
+    aliases = {}
+    for canonical, names in canonical_to_aliases.items():
+        for name in names:
+            aliases[" ".join(tokenize_location(name))] = canonical.lower()
+    return aliases
+
+
+class Gazetteer:
+    """
+    Name index over places with known coordinates.
+
+    Whole place names are matched as word sequences of the input; words that
+    match nothing exactly are compared by trigram similarity. Exact matches
+    beat fuzzy ones; then, as Indian addresses end with the city ("Old
+    Madras Road, Bangalore"), matches in later comma-separated parts win,
+    followed by name length, whether their state is also mentioned in the
+    input, and later positions.
+    """
+
+    def __init__(self, city_coordinates, state_cities=None, aliases=None):
+        self.places = {}       # name -> (canonical name, coordinates)
+        self.place_state = {}  # canonical name -> state (lower-case)
+        self.states = set()
+
+        for name, coords in city_coordinates.items():
+            self.places[" ".join(tokenize_location(name))] = (name, coords)
+
+        for alias, canonical in (aliases or {}).items():
+            if canonical in city_coordinates and alias not in self.places:
+                self.places[alias] = (canonical, city_coordinates[canonical])
+
+        for state, cities in (state_cities or {}).items():
+            self.states.add(state.lower())
+            for city in cities:
+                self.place_state.setdefault(city.lower(), state.lower())
+
+        self.max_words = max((len(name.split()) for name in self.places), default=1)
+
+        self._trigram_index = {}
+        for name in self.places:
+            for trigram in _trigrams(name):
+                self._trigram_index.setdefault(trigram, []).append(name)
+
+    def _fuzzy_matches(self, text):
+        """Get (name, similarity) pairs of places resembling text"""
+        text_trigrams = _trigrams(text)
+        shared = {}
+        for trigram in text_trigrams:
+            for name in self._trigram_index.get(trigram, ()):
+                shared[name] = shared.get(name, 0) + 1
+
+        matches = []
+        for name, count in shared.items():
+            similarity = count / (len(text_trigrams) + len(_trigrams(name)) - count)
+            if similarity >= FUZZY_THRESHOLD:
+                matches.append((name, similarity))
+        return matches
+
+    def lookup(self, location_string, limit=5):
+        """
+        Get ranked candidate places for a location string.
+
+        Args:
+            location_string: Location as typed by the user
+            limit: Maximum number of candidates
+
+        Returns:
+            List of (canonical name, (latitude, longitude), score) tuples,
+            best first; scores of 1 and above are exact name matches
+        """
+        # Words of each comma-separated part, remembering the part they came from
+        tokens = []
+        token_parts = []
+        for part_index, part in enumerate(location_string.split(",")):
+            part_tokens = tokenize_location(part)
+            tokens.extend(part_tokens)
+            token_parts.extend([part_index] * len(part_tokens))
+        text = " ".join(tokens)
+        mentioned_states = {state for state in self.states if state in text}
+
+        scores = {}
+        matched_tokens = set()
+
+        def consider(name, score, position):
+            canonical, coords = self.places[name]
+            if self.place_state.get(canonical) in mentioned_states:
+                score += 0.05
+            key = (score >= EXACT_MATCH_SCORE, token_parts[position], score, position)
+            if canonical not in scores or key > scores[canonical][0]:
+                scores[canonical] = (key, coords)
+
+        for size in range(min(self.max_words, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                if token_parts[start] != token_parts[start + size - 1]:
+                    continue  # Names do not span commas
+                name = " ".join(tokens[start:start + size])
+                if name in self.places:
+                    consider(name, EXACT_MATCH_SCORE + 0.1 * size, start)
+                    matched_tokens.update(range(start, start + size))
+
+        for position, token in enumerate(tokens):
+            if position in matched_tokens or len(token) < MIN_FUZZY_LENGTH or token in self.states:
+                continue
+            for name, similarity in self._fuzzy_matches(token):
+                consider(name, 0.9 * similarity, position)
+            if position + 1 < len(tokens) and token_parts[position + 1] == token_parts[position]:
+                for name, similarity in self._fuzzy_matches(f"{token} {tokens[position + 1]}"):
+                    consider(name, 0.9 * similarity, position)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1][0], reverse=True)
+        return [(canonical, coords, key[2]) for canonical, (key, coords) in ranked[:limit]]
+
+    def resolve(self, location_string, exact_only=False):
+        """
+        Get coordinates of the best candidate place, or None.
+
+        Args:
+            location_string: Location as typed by the user
+            exact_only: Ignore candidates that only match by similarity
+        """
+        candidates = self.lookup(location_string, limit=1)
+        if not candidates or (exact_only and candidates[0][2] < EXACT_MATCH_SCORE):
+            return None
+        return candidates[0][1]
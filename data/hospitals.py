@@ -3,6 +3,9 @@ Indian hospital data with comprehensive information including specialties,
 ratings, NABH accreditation, and insurance acceptance.
 """
 
+import sys
+import numpy as np
+
 HOSPITALS_DATA = [
     # Delhi Hospitals
     {
@@ -360,25 +363,321 @@ HOSPITALS_DATA = [
     }
 ]
 
+class Vocabulary:
+    """Interned string vocabulary mapping each distinct value to an integer id"""
+
+    def __init__(self, values=()):
+        self.names = []
+        self.ids = {}
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value):
+        """Get the id of a value, adding it to the vocabulary if new"""
+        if value not in self.ids:
+            self.ids[value] = len(self.names)
+            self.names.append(sys.intern(value))
+        return self.ids[value]
+
+    def __len__(self):
+        return len(self.names)
+
+
+def normalize_key(value):
+    """Normalize a text value for index lookups"""
+    return " ".join(str(value).lower().split())
+
+
+def intersect_postings(postings):
+    """
+    Intersect sorted posting lists of store rows.
+
+    Starts from the shortest list and binary-searches its rows in the others,
+    so the cost follows the size of the smallest list, not the registry.
+
+    Args:
+        postings: List of sorted NumPy row arrays
+
+    Returns:
+        Sorted NumPy array of rows present in every list
+    """
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        if len(result) == 0:
+            break
+        positions = np.searchsorted(other, result)
+        found = positions < len(other)
+        found[found] = other[positions[found]] == result[found]
+        result = result[found]
+    return result
+
+
+class PostingIndex:
+    """Inverted index from normalized keys to sorted arrays of store rows"""
+
+    def __init__(self, rows_by_key):
+        self.postings = {
+            key: np.array(sorted(set(rows)), dtype=np.int64)
+            for key, rows in rows_by_key.items()
+        }
+
+    def get(self, key):
+        """Get rows stored under a key as-is (used for boolean flags)"""
+        return self.postings.get(key, np.empty(0, dtype=np.int64))
+
+    def exact(self, value):
+        """Get rows whose key equals the normalized value"""
+        return self.get(normalize_key(value))
+
+    def containing(self, text):
+        """Get rows whose key contains the normalized text as a substring"""
+        text = normalize_key(text)
+        matches = [rows for key, rows in self.postings.items() if text in key]
+        if not matches:
+            return np.empty(0, dtype=np.int64)
+        if len(matches) == 1:
+            return matches[0]
+        return np.unique(np.concatenate(matches))
+
+
+class HospitalStore:
+    """
+    Columnar (struct-of-arrays) view over a list of hospital records.
+
+    Numeric and flag fields are held in parallel NumPy arrays indexed by row,
+    and specialties and insurance schemes are interned into integer ids stored
+    as flattened id arrays with per-row offsets. The original records are kept
+    untouched and only copied when a result is materialized for display.
+    """
+
+    def __init__(self, records):
+        self.records = list(records)
+        count = len(self.records)
+
+        self.latitude = np.full(count, np.nan)
+        self.longitude = np.full(count, np.nan)
+        self.rating = np.zeros(count)
+        self.nabh_accredited = np.zeros(count, dtype=bool)
+        self.emergency_services = np.zeros(count, dtype=bool)
+
+        self.types = Vocabulary()
+        self.cities = Vocabulary()
+        self.states = Vocabulary()
+        self.specialties = Vocabulary()
+        self.insurance = Vocabulary()
+
+        type_codes = []
+        city_codes = []
+        state_codes = []
+        specialty_ids = []
+        specialty_offsets = [0]
+        insurance_ids = []
+        insurance_offsets = [0]
+
+        for row, hospital in enumerate(self.records):
+            try:
+                self.latitude[row] = float(hospital['latitude'])
+                self.longitude[row] = float(hospital['longitude'])
+            except (KeyError, TypeError, ValueError):
+                pass
+            self.rating[row] = hospital.get('rating', 0)
+            self.nabh_accredited[row] = bool(hospital.get('nabh_accredited', False))
+            self.emergency_services[row] = bool(hospital.get('emergency_services', False))
+
+            type_codes.append(self.types.intern(hospital.get('type', '')))
+            city_codes.append(self.cities.intern(hospital.get('city', '')))
+            state_codes.append(self.states.intern(hospital.get('state', '')))
+
+            for specialty in hospital.get('specialties', []):
+                specialty_ids.append(self.specialties.intern(specialty))
+            specialty_offsets.append(len(specialty_ids))
+
+            for insurance in hospital.get('insurance_accepted') or []:
+                insurance_ids.append(self.insurance.intern(insurance))
+            insurance_offsets.append(len(insurance_ids))
+
+        self.type_code = np.array(type_codes, dtype=np.int16)
+        self.city_code = np.array(city_codes, dtype=np.int32)
+        self.state_code = np.array(state_codes, dtype=np.int32)
+        self.specialty_ids = np.array(specialty_ids, dtype=np.int32)
+        self.specialty_offsets = np.array(specialty_offsets, dtype=np.int64)
+        self.insurance_ids = np.array(insurance_ids, dtype=np.int32)
+        self.insurance_offsets = np.array(insurance_offsets, dtype=np.int64)
+
+        self._build_indexes()
+        self._derived = {}
+
+    def _build_indexes(self):
+        """Build the inverted indexes used by find_hospitals"""
+        rows_by_field = {
+            'city': {}, 'state': {}, 'type': {}, 'specialty': {},
+            'specialty_token': {}, 'insurance': {}, 'nabh': {}, 'emergency': {}
+        }
+
+        def add(field, key, row):
+            rows_by_field[field].setdefault(key, []).append(row)
+
+        for row in range(len(self.records)):
+            add('city', normalize_key(self.cities.names[self.city_code[row]]), row)
+            add('state', normalize_key(self.states.names[self.state_code[row]]), row)
+            add('type', normalize_key(self.types.names[self.type_code[row]]), row)
+            add('nabh', bool(self.nabh_accredited[row]), row)
+            add('emergency', bool(self.emergency_services[row]), row)
+
+            start, end = self.specialty_offsets[row], self.specialty_offsets[row + 1]
+            for specialty_id in self.specialty_ids[start:end]:
+                specialty = normalize_key(self.specialties.names[specialty_id])
+                add('specialty', specialty, row)
+                for token in specialty.split():
+                    add('specialty_token', token, row)
+
+            start, end = self.insurance_offsets[row], self.insurance_offsets[row + 1]
+            for insurance_id in self.insurance_ids[start:end]:
+                add('insurance', normalize_key(self.insurance.names[insurance_id]), row)
+
+        self.indexes = {
+            field: PostingIndex(rows_by_key) for field, rows_by_key in rows_by_field.items()
+        }
+
+    def __len__(self):
+        return len(self.records)
+
+    def type_mask(self, hospital_types, rows=None):
+        """
+        Get a boolean mask of hospitals whose type is in hospital_types.
+
+        Args:
+            hospital_types: Hospital type names to accept
+            rows: Row positions to check (defaults to every row)
+
+        Returns:
+            Boolean NumPy array aligned with rows
+        """
+        codes = [code for code, name in enumerate(self.types.names) if name in hospital_types]
+        type_code = self.type_code if rows is None else self.type_code[rows]
+        return np.isin(type_code, codes)
+
+    def derived(self, name, builder):
+        """
+        Get a structure derived from this store, building it on first use.
+
+        Args:
+            name: Cache key for the derived structure
+            builder: Callable taking the store and returning the structure
+
+        Returns:
+            The cached structure
+        """
+        if name not in self._derived:
+            self._derived[name] = builder(self)
+        return self._derived[name]
+
+    def find_rows(self, city=None, state=None, specialty=None, specialty_token=None,
+                  insurance=None, hospital_type=None, nabh_accredited=None,
+                  emergency_services=None):
+        """
+        Find rows matching all of the given filters using the inverted indexes.
+
+        City, state, specialty and insurance filters match any indexed value
+        containing the text (case-insensitive), like the substring checks of
+        get_hospitals_by_location. specialty_token and hospital_type must
+        match a whole word or type exactly. Filters left as None are ignored.
+
+        Returns:
+            Sorted NumPy array of matching rows
+        """
+        postings = []
+        for field, text in (('city', city), ('state', state), ('specialty', specialty),
+                            ('insurance', insurance)):
+            if text is not None:
+                postings.append(self.indexes[field].containing(text))
+        if specialty_token is not None:
+            postings.append(self.indexes['specialty_token'].exact(specialty_token))
+        if hospital_type is not None:
+            postings.append(self.indexes['type'].exact(hospital_type))
+        if nabh_accredited is not None:
+            postings.append(self.indexes['nabh'].get(bool(nabh_accredited)))
+        if emergency_services is not None:
+            postings.append(self.indexes['emergency'].get(bool(emergency_services)))
+
+        if not postings:
+            return np.arange(len(self.records))
+        return intersect_postings(postings)
+
+    def materialize(self, row, **fields):
+        """
+        Build a standalone hospital dictionary for one row.
+
+        Args:
+            row: Row position in the store
+            **fields: Extra per-query fields (distance, scores) to add
+
+        Returns:
+            Copy of the hospital record with the extra fields set
+        """
+        hospital = self.records[int(row)].copy()
+        hospital.update(fields)
+        return hospital
+
+
+HOSPITAL_STORE = HospitalStore(HOSPITALS_DATA)
+
+# Callables run with the new store whenever the hospital data is reloaded
+_RELOAD_HOOKS = []
+
+def get_hospital_store():
+    """Get the columnar store over the currently loaded hospital data"""
+    return HOSPITAL_STORE
+
+def register_reload_hook(hook):
+    """
+    Run a callable on every newly loaded hospital store.
+
+    The hook is also run right away for the store that is currently loaded,
+    which lets modules precompute derived data both at load and on reload.
+
+    Args:
+        hook: Callable taking a HospitalStore
+    """
+    _RELOAD_HOOKS.append(hook)
+    hook(HOSPITAL_STORE)
+
+def reload_hospitals(records):
+    """
+    Replace the loaded hospital data and rebuild the columnar store.
+
+    Args:
+        records: List of hospital dictionaries
+
+    Returns:
+        The new HospitalStore
+    """
+    global HOSPITALS_DATA, HOSPITAL_STORE
+    HOSPITALS_DATA = list(records)
+    HOSPITAL_STORE = HospitalStore(HOSPITALS_DATA)
+    for hook in _RELOAD_HOOKS:
+        hook(HOSPITAL_STORE)
+    return HOSPITAL_STORE
+
+def find_hospitals(**filters):
+    """
+    Get hospitals matching all of the given filters.
+
+    Accepts the filters of HospitalStore.find_rows, for example
+    find_hospitals(city="Mumbai", insurance="Ayushman Bharat", emergency_services=True).
+    """
+    store = get_hospital_store()
+    return [store.records[row] for row in store.find_rows(**filters)]
+
 def get_hospitals_by_location(city, state=None):
     """Get hospitals filtered by city and optionally by state"""
-    filtered_hospitals = []
-    
-    for hospital in HOSPITALS_DATA:
-        if city.lower() in hospital['city'].lower():
-            if state is None or state.lower() in hospital['state'].lower():
-                filtered_hospitals.append(hospital)
-    
-    return filtered_hospitals
+    return find_hospitals(city=city, state=state)
 
 def get_hospitals_by_specialty(specialty):
     """Get hospitals that have the specified specialty"""
-    specialty_hospitals = []
-    
-    for hospital in HOSPITALS_DATA:
-        for hosp_specialty in hospital['specialties']:
-            if specialty.lower() in hosp_specialty.lower():
-                specialty_hospitals.append(hospital)
-                break
-    
-    return specialty_hospitals
+    return find_hospitals(specialty=specialty)
+
+def get_hospitals_by_insurance(insurance):
+    """Get hospitals that accept the specified insurance scheme"""
+    return find_hospitals(insurance=insurance)
@@ -3,8 +3,32 @@ Indian states, cities, and geographical coordinates for location-based hospital
 """
 
 from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
-import time
+from concurrent.futures import ThreadPoolExecutor
+import os
+from data.gazetteer import DEFAULT_ALIASES_PATH, Gazetteer, load_aliases
+from data.pincodes import load_pincode_geocoder
+from utils.geocache import (
+    ERROR_TTL_SECONDS, GeocodeCache, default_cache_path, normalize_location_key
+)
+from utils.geocoding import (
+    ERROR, TIMEOUT, RateLimiter, SingleFlight, geocode_with_deadline
+)
+from utils.metrics import increment, timed
+
+# Geocoding service settings; NOMINATIM_DOMAIN and NOMINATIM_SCHEME can point
+# the app at a self-hosted or local stand-in Nominatim server
+GEOCODER_USER_AGENT = "indian_hospital_finder"
+GEOCODER_TIMEOUT = 10
+
+# Set to 1 for air-gapped deployments: locations are only resolved from local data
+OFFLINE_MODE = os.environ.get("HOSPITAL_FINDER_OFFLINE", "") == "1"
+
+# Overall time budget for one network geocoding lookup, in seconds
+GEOCODE_DEADLINE_SECONDS = 8
+
+# Minimum spacing between requests; the public Nominatim usage policy allows
+# at most one request per second
+GEOCODER_MIN_INTERVAL = float(os.environ.get("NOMINATIM_MIN_INTERVAL", "1.0"))
 
 # Major Indian locations with coordinates
 INDIAN_LOCATIONS = {
@@ -96,42 +120,162 @@ CITY_COORDINATES = {
     "visakhapatnam": (17.6868, 83.2185)
 }
 
+# Offline name index over CITY_COORDINATES, INDIAN_LOCATIONS and known aliases
+GAZETTEER = Gazetteer(CITY_COORDINATES, INDIAN_LOCATIONS, load_aliases())
+
+def reload_location_aliases(path=DEFAULT_ALIASES_PATH):
+    """
+    Rebuild the gazetteer with aliases from a different file.
+    
+    Args:
+        path: JSON file mapping canonical city names to lists of aliases
+    """
+    global GAZETTEER
+    GAZETTEER = Gazetteer(CITY_COORDINATES, INDIAN_LOCATIONS, load_aliases(path))
+
+_pincode_geocoder = None
+
+def get_pincode_geocoder():
+    """Get the offline PIN-code and locality geocoder, loading it on first use"""
+    global _pincode_geocoder
+    if _pincode_geocoder is None:
+        _pincode_geocoder = load_pincode_geocoder()
+    return _pincode_geocoder
+
+_geocoder = None
+
+# Cache of geocoding results for locations not in CITY_COORDINATES
+GEOCODE_CACHE = GeocodeCache(default_cache_path())
+
+def get_geocoder():
+    """Get the geocoder used for locations missing from CITY_COORDINATES"""
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = Nominatim(
+            user_agent=GEOCODER_USER_AGENT,
+            domain=os.environ.get("NOMINATIM_DOMAIN", "nominatim.openstreetmap.org"),
+            scheme=os.environ.get("NOMINATIM_SCHEME", "https")
+        )
+    return _geocoder
+
+def set_geocoder(geocoder):
+    """
+    Replace the geocoder, for example with a local stand-in during testing.
+    
+    Args:
+        geocoder: Object with a geopy-style geocode(query, timeout=...) method,
+            or None to go back to Nominatim
+    """
+    global _geocoder
+    _geocoder = geocoder
+
+def set_geocode_cache(cache):
+    """Replace the geocoding cache (e.g. with an in-memory GeocodeCache)"""
+    global GEOCODE_CACHE
+    GEOCODE_CACHE = cache
+
+def get_geocode_cache_stats():
+    """Get hit and miss counters of the geocoding cache"""
+    return dict(GEOCODE_CACHE.stats)
+
+# Shared by all sessions: request spacing, lookup coalescing and worker threads
+_rate_limiter = RateLimiter(GEOCODER_MIN_INTERVAL)
+_inflight_lookups = SingleFlight()
+_geocode_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="geocode")
+
+def find_local_match(location_string):
+    """
+    Find the best match for a location using only local data.
+    
+    Used when network geocoding cannot answer in time: the gazetteer's best
+    candidate is used, and otherwise a state name in the location resolves to
+    the first city of that state with known coordinates.
+    
+    Returns:
+        Tuple of (latitude, longitude), or None if nothing matches
+    """
+    coords = GAZETTEER.resolve(location_string)
+    if coords:
+        return coords
+    
+    location_lower = location_string.lower()
+    
+    for state, cities in INDIAN_LOCATIONS.items():
+        if state.lower() in location_lower:
+            for city in cities:
+                if city.lower() in CITY_COORDINATES:
+                    return CITY_COORDINATES[city.lower()]
+    
+    return None
+
+def _geocode(location_string):
+    """
+    Geocode a location with the network geocoder.
+    
+    The "India"-suffixed and plain queries run in parallel under
+    GEOCODE_DEADLINE_SECONDS; the suffixed result is preferred because it
+    improves accuracy. If the deadline passes, the best local match is used.
+    
+    Returns:
+        Tuple of (coordinates or None, True if the result should only be
+        cached briefly because the lookup failed or timed out)
+    """
+    increment('geocoder_calls')
+    coords, outcome = geocode_with_deadline(
+        get_geocoder(),
+        [f"{location_string}, India", location_string],
+        GEOCODE_DEADLINE_SECONDS,
+        _geocode_executor,
+        rate_limiter=_rate_limiter,
+        request_timeout=GEOCODER_TIMEOUT
+    )
+    
+    if outcome == TIMEOUT:
+        print(f"Geocoding timed out for {location_string}, using local data")
+        coords = find_local_match(location_string)
+    
+    return coords, outcome in (ERROR, TIMEOUT)
+
+@timed('geocode')
 def get_coordinates(location_string):
     """
     Get coordinates for a location string.
-    First tries the predefined coordinates, then falls back to geocoding.
+    First tries offline data (PIN codes and localities, then the gazetteer of
+    predefined coordinates), then the geocoding cache, and finally falls
+    back to geocoding.
     """
-    # Clean and normalize the location string
-    location_clean = location_string.lower().strip()
-    
-    # Remove common suffixes and prefixes
-    location_clean = location_clean.replace(" district", "").replace(" city", "")
-    
-    # Try to find in predefined coordinates
-    for city, coords in CITY_COORDINATES.items():
-        if city in location_clean or location_clean in city:
-            return coords
-    
-    # Fall back to geocoding for more specific locations
-    try:
-        geolocator = Nominatim(user_agent="indian_hospital_finder")
-        # Add "India" to improve geocoding accuracy
-        search_location = f"{location_string}, India"
-        location = geolocator.geocode(search_location, timeout=10)
-        
-        if location:
-            return (location.latitude, location.longitude)
-        else:
-            # Try without "India" suffix
-            location = geolocator.geocode(location_string, timeout=10)
-            if location:
-                return (location.latitude, location.longitude)
-    
-    except (GeocoderTimedOut, Exception) as e:
-        print(f"Geocoding failed for {location_string}: {e}")
-    
-    # If all else fails, return None
-    return None
+    # PIN codes and "locality, city" inputs are the most precise local answers
+    coords = get_pincode_geocoder().resolve(location_string)
+    if coords:
+        increment('geocode_local_hits')
+        return coords
+    
+    # Try to find in predefined coordinates and aliases; close spellings are
+    # only trusted offline or when network geocoding cannot answer in time
+    coords = GAZETTEER.resolve(location_string, exact_only=True)
+    if coords:
+        increment('geocode_local_hits')
+        return coords
+    
+    if OFFLINE_MODE:
+        return find_local_match(location_string)
+    
+    # Reuse earlier geocoding results, including failures
+    cache_key = normalize_location_key(location_string)
+    found, coords = GEOCODE_CACHE.get(cache_key)
+    if found:
+        increment('geocode_cache_hits')
+        return coords
+    
+    # Fall back to geocoding for more specific locations, sharing the
+    # lookup with any other session asking for the same place right now
+    def lookup():
+        coords, failed = _geocode(location_string)
+        GEOCODE_CACHE.set(cache_key, coords, ttl=ERROR_TTL_SECONDS if failed else None)
+        return coords
+    
+    # If all else fails, this is None
+    return _inflight_lookups.do(cache_key, lookup)
 
 def get_nearby_cities(state, target_city):
     """Get list of cities in the same state for nearby search"""
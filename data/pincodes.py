@@ -0,0 +1,239 @@
+"""
+Offline PIN-code and locality geocoder.
+Centroids are read from a CSV file and compiled into NumPy arrays stored as
+.npy files, which are memory-mapped so a lookup is a binary search over data
+the operating system pages in on demand.
+
+Build or rebuild the compiled files with:
+    python -m data.pincodes [path/to/pincodes.csv]
+"""
+
+import csv
+import os
+import re
+import sys
+import numpy as np
+
+DEFAULT_PINCODE_CSV = os.path.join(os.path.dirname(__file__), "pincodes.csv")
+PINCODE_CSV_ENV = "HOSPITAL_FINDER_PINCODE_CSV"
+
+# Compiled file names, written next to the CSV
+PINCODE_ARRAY_FILE = "pincodes.npy"
+LOCALITY_ARRAY_FILE = "pincode_localities.npy"
+
+# One record per distinct PIN code, sorted by PIN code
+PINCODE_DTYPE = np.dtype([("pincode", "<u4"), ("latitude", "<f4"), ("longitude", "<f4")])
+
+# One record per distinct locality and city, sorted by key ("locality|city")
+LOCALITY_KEY_BYTES = 64
+LOCALITY_DTYPE = np.dtype([
+    ("key", f"S{LOCALITY_KEY_BYTES}"), ("latitude", "<f4"), ("longitude", "<f4")
+])
+
+_PINCODE_PATTERN = re.compile(r"(?<!\d)([1-9]\d{2})\s?(\d{3})(?!\d)")
+
+
+def _normalize(text):
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def locality_key(locality, city):
+    """Build the lookup key for a locality within a city"""
+    key = f"{_normalize(locality)}|{_normalize(city)}".encode("utf-8")
+    return key[:LOCALITY_KEY_BYTES]
+
+
+def _read_rows(csv_path):
+    """Read centroid rows from a CSV file, skipping '#' comment lines"""
+    with open(csv_path, encoding="utf-8", newline="") as csv_file:
+        lines = (line for line in csv_file if not line.startswith("#"))
+        for row in csv.DictReader(lines):
+            try:
+                yield (int(row["pincode"]), row["locality"], row["city"],
+                       float(row["latitude"]), float(row["longitude"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+
+def _centroids(keyed_coords, dtype):
+    """Average coordinates sharing a key into a sorted structured array"""
+    sums = {}
+    for key, latitude, longitude in keyed_coords:
+        total = sums.setdefault(key, [0.0, 0.0, 0])
+        total[0] += latitude
+        total[1] += longitude
+        total[2] += 1
+
+    records = np.zeros(len(sums), dtype=dtype)
+    for i, key in enumerate(sorted(sums)):
+        lat_sum, lng_sum, count = sums[key]
+        records[i] = (key, lat_sum / count, lng_sum / count)
+    return records
+
+
+def compile_pincode_arrays(csv_path):
+    """
+    Compile a centroid CSV into sorted PIN-code and locality arrays.
+
+    Args:
+        csv_path: CSV with pincode, locality, city, latitude and longitude columns
+
+    Returns:
+        Tuple of (PIN-code array, locality array)
+    """
+    rows = list(_read_rows(csv_path))
+    pincodes = _centroids(
+        ((pincode, lat, lng) for pincode, _, _, lat, lng in rows), PINCODE_DTYPE
+    )
+    localities = _centroids(
+        ((locality_key(locality, city), lat, lng) for _, locality, city, lat, lng in rows),
+        LOCALITY_DTYPE
+    )
+    return pincodes, localities
+
+
+def build_pincode_files(csv_path, output_dir=None):
+    """
+    Compile a centroid CSV into the .npy files used by PincodeGeocoder.
+
+    Args:
+        csv_path: Source CSV file
+        output_dir: Directory for the compiled files (defaults to the CSV's)
+
+    Returns:
+        Tuple of the written (PIN-code file, locality file) paths
+    """
+    output_dir = output_dir or os.path.dirname(os.path.abspath(csv_path))
+    pincodes, localities = compile_pincode_arrays(csv_path)
+
+    paths = (os.path.join(output_dir, PINCODE_ARRAY_FILE),
+             os.path.join(output_dir, LOCALITY_ARRAY_FILE))
+    for path, array in zip(paths, (pincodes, localities)):
+        # Write to a temporary file first so readers never see a partial file
+        temporary_path = f"{path}.tmp.npy"
+        np.save(temporary_path, array)
+        os.replace(temporary_path, path)
+    return paths
+
+
+class PincodeGeocoder:
+    """
+    Resolves 6-digit PIN codes and "locality, city" inputs from local data.
+
+    A PIN code missing from the data falls back to the centroid of all PIN
+    codes sharing its first three digits (its sorting district).
+    """
+
+    def __init__(self, pincodes, localities):
+        self.pincodes = pincodes
+        self.localities = localities
+        self._pincode_keys = pincodes["pincode"]
+        self._locality_keys = localities["key"]
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        """
+        Load the compiled files for a CSV, compiling them first if needed.
+
+        The compiled files are memory-mapped. If they are missing or older
+        than the CSV and cannot be written, the CSV is compiled in memory.
+        """
+        directory = os.path.dirname(os.path.abspath(csv_path))
+        paths = (os.path.join(directory, PINCODE_ARRAY_FILE),
+                 os.path.join(directory, LOCALITY_ARRAY_FILE))
+
+        try:
+            csv_mtime = os.path.getmtime(csv_path)
+        except OSError:
+            csv_mtime = None
+
+        stale = csv_mtime is not None and any(
+            not os.path.exists(path) or os.path.getmtime(path) < csv_mtime for path in paths
+        )
+        if stale:
+            try:
+                build_pincode_files(csv_path, directory)
+            except OSError as e:
+                print(f"Could not write compiled PIN-code files, loading {csv_path} in memory: {e}")
+                return cls(*compile_pincode_arrays(csv_path))
+
+        try:
+            return cls(*(np.load(path, mmap_mode="r") for path in paths))
+        except (OSError, ValueError) as e:
+            print(f"Offline PIN-code geocoding unavailable: {e}")
+            return cls(np.zeros(0, dtype=PINCODE_DTYPE), np.zeros(0, dtype=LOCALITY_DTYPE))
+
+    def __len__(self):
+        return len(self.pincodes)
+
+    def lookup_pincode(self, pincode):
+        """
+        Get the centroid of a PIN code.
+
+        Args:
+            pincode: 6-digit PIN code as int or string
+
+        Returns:
+            Tuple of (latitude, longitude), or None if its district is unknown
+        """
+        pincode = int(pincode)
+        position = np.searchsorted(self._pincode_keys, pincode)
+        if position < len(self._pincode_keys) and self._pincode_keys[position] == pincode:
+            record = self.pincodes[position]
+            return (round(float(record["latitude"]), 4), round(float(record["longitude"]), 4))
+
+        # Fall back to the centroid of the sorting district
+        district_start = pincode // 1000 * 1000
+        start = np.searchsorted(self._pincode_keys, district_start)
+        end = np.searchsorted(self._pincode_keys, district_start + 1000)
+        if end > start:
+            district = self.pincodes[start:end]
+            return (round(float(district["latitude"].mean()), 4),
+                    round(float(district["longitude"].mean()), 4))
+        return None
+
+    def lookup_locality(self, locality, city):
+        """Get the centroid of a locality within a city, or None"""
+        key = locality_key(locality, city)
+        position = np.searchsorted(self._locality_keys, key)
+        if position < len(self._locality_keys) and self._locality_keys[position] == key:
+            record = self.localities[position]
+            return (round(float(record["latitude"]), 4), round(float(record["longitude"]), 4))
+        return None
+
+    def resolve(self, location_string):
+        """
+        Resolve a location containing a PIN code or a "locality, city" pair.
+
+        Args:
+            location_string: Location as typed by the user
+
+        Returns:
+            Tuple of (latitude, longitude), or None if not found locally
+        """
+        match = _PINCODE_PATTERN.search(location_string)
+        if match:
+            coords = self.lookup_pincode(match.group(1) + match.group(2))
+            if coords:
+                return coords
+
+        if len(self.localities):
+            parts = [part for part in (p.strip() for p in location_string.split(",")) if part]
+            for i in range(len(parts) - 1):
+                for city in parts[i + 1:]:
+                    coords = self.lookup_locality(parts[i], city)
+                    if coords:
+                        return coords
+        return None
+
+
+def load_pincode_geocoder(csv_path=None):
+    """Load the offline geocoder for the configured (or given) centroid CSV"""
+    csv_path = csv_path or os.environ.get(PINCODE_CSV_ENV, DEFAULT_PINCODE_CSV)
+    return PincodeGeocoder.from_csv(csv_path)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PINCODE_CSV
+    for written in build_pincode_files(source):
+        print(f"Wrote {written}")
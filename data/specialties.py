@@ -0,0 +1,180 @@
+"""
+Canonical medical specialty IDs and precomputed specialty similarity.
+Every specialty name used by the condition mapping, the hospital data and the
+related-specialty groups is interned once (case-insensitively) into an
+integer ID, and the similarity of every pair of IDs is kept in a matrix, so
+specialty matching needs no string comparisons at query time.
+"""
+
+import threading
+import numpy as np
+from data.conditions import CONDITION_TO_SPECIALTY
+from data.hospitals import HOSPITALS_DATA
+
+# Groups of closely related specialties
+RELATED_SPECIALTY_GROUPS = [
+    ["Cardiology", "Cardiac Surgery", "Cardiovascular Surgery"],
+    ["Neurology", "Neurosurgery", "Neurological Surgery"],
+    ["Orthopedics", "Orthopedic Surgery", "Sports Medicine"],
+    ["Gastroenterology", "Hepatology", "GI Surgery"],
+    ["Oncology", "Surgical Oncology", "Medical Oncology", "Radiation Therapy"],
+    ["Urology", "Nephrology", "Kidney Transplant"],
+    ["Obstetrics", "Gynecology", "Reproductive Medicine"],
+    ["Pediatrics", "Neonatology", "Pediatric Surgery"],
+    ["Internal Medicine", "General Medicine", "Family Medicine"],
+    ["Emergency Medicine", "Trauma Surgery", "Critical Care"],
+    ["Psychiatry", "Psychology", "Mental Health"],
+    ["Pulmonology", "Respiratory Medicine", "Thoracic Surgery"]
+]
+
+# Similarity levels between two specialties, checked from EXACT down
+NO_MATCH = 0
+RELATED = 1  # Both in one of the RELATED_SPECIALTY_GROUPS
+PARTIAL = 2  # One name contains the other
+EXACT = 3    # Same name, ignoring case
+
+# Specialty match weight of each similarity level
+LEVEL_WEIGHTS = (0, 0.5, 0.7, 1)
+
+
+class SpecialtyRegistry:
+    """
+    Case-insensitive specialty vocabulary with a pairwise similarity matrix.
+
+    IDs are positions in names (lower-cased). The matrix grows when a new
+    name is interned, so hospital data loaded later can bring new specialties.
+    """
+
+    def __init__(self, names=(), related_groups=RELATED_SPECIALTY_GROUPS):
+        self.names = []
+        self.ids = {}
+        self.similarity = np.zeros((0, 0), dtype=np.uint8)
+        self._groups = {}
+        self._lock = threading.Lock()
+
+        for group_index, group in enumerate(related_groups):
+            for name in group:
+                self._groups.setdefault(name.lower(), set()).add(group_index)
+
+        self.intern_all([name for group in related_groups for name in group])
+        self.intern_all(names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def are_related(self, spec1, spec2):
+        """Check if two specialty names share a related-specialty group"""
+        groups = self._groups.get(spec1.lower())
+        return bool(groups) and not groups.isdisjoint(self._groups.get(spec2.lower(), ()))
+
+    def _level(self, name1, name2):
+        """Similarity level of two lower-cased names"""
+        if name1 == name2:
+            return EXACT
+        if name1 in name2 or name2 in name1:
+            return PARTIAL
+        if self.are_related(name1, name2):
+            return RELATED
+        return NO_MATCH
+
+    def intern_all(self, names):
+        """
+        Get the IDs of several specialty names, adding new ones in one step.
+
+        Args:
+            names: Iterable of specialty names
+
+        Returns:
+            NumPy array of specialty IDs
+        """
+        keys = [name.lower() for name in names]
+        new_keys = [key for key in dict.fromkeys(keys) if key not in self.ids]
+        if new_keys:
+            with self._lock:
+                new_keys = [key for key in new_keys if key not in self.ids]
+                old_count = len(self.names)
+                all_keys = self.names + new_keys
+
+                similarity = np.zeros((len(all_keys), len(all_keys)), dtype=np.uint8)
+                similarity[:old_count, :old_count] = self.similarity
+                for i in range(old_count, len(all_keys)):
+                    for j in range(i + 1):
+                        similarity[i, j] = similarity[j, i] = self._level(all_keys[i], all_keys[j])
+
+                # Publish the larger matrix before the IDs that index into it
+                self.similarity = similarity
+                for key in new_keys:
+                    self.ids[key] = len(self.names)
+                    self.names.append(key)
+
+        return np.array([self.ids[key] for key in keys], dtype=np.int32)
+
+    def intern(self, name):
+        """Get the ID of a specialty name, adding it if new"""
+        specialty_id = self.ids.get(name.lower())
+        if specialty_id is None:
+            specialty_id = int(self.intern_all([name])[0])
+        return specialty_id
+
+    def first_match_levels(self, required_ids, hospital_ids, offsets):
+        """
+        Get how each hospital matches each required specialty.
+
+        As in specialty matching, the first hospital specialty with any
+        similarity to a required specialty decides the level.
+
+        Args:
+            required_ids: Specialty IDs needed for a condition
+            hospital_ids: Flattened specialty IDs of the hospitals
+            offsets: Start of each hospital's IDs in hospital_ids, plus the end
+
+        Returns:
+            uint8 array of levels, one row per required specialty and one
+            column per hospital
+        """
+        required_ids = np.asarray(required_ids, dtype=np.int64)
+        hospital_ids = np.asarray(hospital_ids, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        starts, ends = offsets[:-1], offsets[1:]
+
+        result = np.zeros((len(required_ids), len(starts)), dtype=np.uint8)
+        nonempty = np.flatnonzero(ends > starts)
+        if len(required_ids) == 0 or len(nonempty) == 0:
+            return result
+
+        levels = self.similarity[np.ix_(required_ids, hospital_ids)]
+        total = len(hospital_ids)
+        positions = np.where(levels > 0, np.arange(total), total)
+
+        # Position of the first matching entry of every hospital, or total
+        first = np.full(result.shape, total, dtype=np.int64)
+        first[:, nonempty] = np.minimum.reduceat(positions, starts[nonempty], axis=1)
+
+        required_rows, hospital_columns = np.nonzero(first < ends)
+        result[required_rows, hospital_columns] = levels[
+            required_rows, first[required_rows, hospital_columns]
+        ]
+        return result
+
+
+SPECIALTIES = SpecialtyRegistry(
+    [specialty for specialties in CONDITION_TO_SPECIALTY.values() for specialty in specialties] +
+    [specialty for hospital in HOSPITALS_DATA for specialty in hospital.get('specialties', [])]
+)
+
+def specialty_id(name):
+    """Get the canonical ID of a specialty name"""
+    return SPECIALTIES.intern(name)
+
+def get_store_specialty_ids(store):
+    """
+    Get the canonical specialty IDs of every hospital in a store.
+
+    Returns:
+        Flattened canonical IDs aligned with store.specialty_ids, so the
+        store's specialty_offsets delimit each hospital's IDs
+    """
+    return store.derived(
+        'canonical_specialty_ids',
+        lambda s: SPECIALTIES.intern_all(s.specialties.names)[s.specialty_ids]
+    )
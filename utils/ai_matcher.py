@@ -3,11 +3,101 @@ AI-powered hospital matching system for Indian healthcare.
 Matches hospitals to medical conditions based on specialties, ratings, and other factors.
 """
 
+import heapq
 import random
-from data.conditions import get_condition_specialties, is_emergency_condition
-from data.hospitals import HOSPITALS_DATA, get_hospitals_by_specialty
-from data.locations import get_coordinates
-from utils.distance import calculate_distance, find_nearest_hospitals
+from collections import namedtuple
+import numpy as np
+from data.conditions import CONDITION_TO_SPECIALTY, get_condition_specialties, is_emergency_condition
+from data.hospitals import get_hospital_store, get_hospitals_by_specialty, register_reload_hook
+from data.locations import CITY_COORDINATES, get_coordinates
+from data.specialties import LEVEL_WEIGHTS, SPECIALTIES
+from utils.distance import MAX_EXPANDED_RADIUS_KM, calculate_distance, calculate_distance_matrix, get_distance_info
+from utils.metrics import increment, start_timer
+from utils.query_planner import execute_plan, plan_query
+from utils.spatial_index import DistanceTable, GeoGridIndex
+from utils.specialty_matrix import SpecialtyScoreMatrix, score_rows
+
+# Hospital type preference sets offered by the app, precomputed at load
+DEFAULT_TYPE_PREFERENCES = [['Government', 'Private'], ['Government'], ['Private']]
+
+# Number of results returned when the user's location cannot be geocoded
+FALLBACK_RESULTS = 20
+
+# Largest origins x hospitals block of distances a batch computes at once
+BATCH_DISTANCE_CELLS = 4000000
+
+def get_spatial_index(store):
+    """Get the spatial index over a hospital store's coordinates"""
+    return store.derived(
+        'spatial_index', lambda s: GeoGridIndex(s.latitude, s.longitude)
+    )
+
+def get_city_distance_table(store):
+    """
+    Get the precomputed distances from every predefined city to the nearby
+    hospitals in a store, used for searches from the city dropdowns
+    """
+    return store.derived(
+        'city_distance_table',
+        lambda s: DistanceTable(get_spatial_index(s), CITY_COORDINATES.values())
+    )
+
+def get_quality_scores(store):
+    """Get the quality score of every hospital in a store as an array"""
+    return store.derived(
+        'quality_scores',
+        lambda s: np.array([calculate_quality_score(hospital) for hospital in s.records], dtype=float)
+    )
+
+def get_accessibility_scores(store, hospital_types):
+    """Get the accessibility score of every hospital for a type preference"""
+    return store.derived(
+        ('accessibility_scores', frozenset(hospital_types)),
+        lambda s: np.array([
+            calculate_accessibility_score(hospital, None, hospital_types)
+            for hospital in s.records
+        ], dtype=float)
+    )
+
+# Specialty matrix of the previously loaded data, reused when rebuilding
+_last_specialty_matrix = None
+
+def get_specialty_matrix(store):
+    """Get the specialty match scores of every known condition for a store"""
+    def build(s):
+        global _last_specialty_matrix
+        condition_specialties = [get_condition_specialties(c) for c in CONDITION_TO_SPECIALTY]
+        _last_specialty_matrix = SpecialtyScoreMatrix(s, condition_specialties, _last_specialty_matrix)
+        return _last_specialty_matrix
+    return store.derived('specialty_matrix', build)
+
+def prepare_store(store):
+    """Precompute the query-independent structures for a hospital store"""
+    get_spatial_index(store)
+    get_city_distance_table(store).warm()
+    get_specialty_matrix(store)
+    get_quality_scores(store)
+    for hospital_types in DEFAULT_TYPE_PREFERENCES:
+        get_accessibility_scores(store, hospital_types)
+
+# Weight factors for the AI score components
+SCORE_WEIGHTS = {
+    'specialty_match': 0.4,
+    'quality': 0.3,
+    'accessibility': 0.2,
+    'distance': 0.1
+}
+
+# Condition-level inputs to scoring, resolved once per query
+QueryContext = namedtuple('QueryContext', [
+    'required_specialties', 'is_emergency', 'hospital_types', 'max_distance'
+])
+
+# Per-hospital scoring result; the score fields are shown in the UI
+ScoreBreakdown = namedtuple('ScoreBreakdown', [
+    'ai_score', 'specialty_score', 'quality_score', 'accessibility_score',
+    'distance_score', 'emergency_bonus'
+])
 
 def calculate_specialty_match_score(condition, hospital_specialties):
     """
@@ -20,8 +110,19 @@ def calculate_specialty_match_score(condition, hospital_specialties):
     Returns:
         Match score from 0 to 100
     """
-    required_specialties = get_condition_specialties(condition)
+    return score_specialties(get_condition_specialties(condition), hospital_specialties)
+
+def score_specialties(required_specialties, hospital_specialties):
+    """
+    Calculate how well hospital specialties cover a resolved list of specialties.
+    
+    Args:
+        required_specialties: Specialties needed for the condition
+        hospital_specialties: List of hospital specialties
     
+    Returns:
+        Match score from 0 to 100
+    """
     if not required_specialties:
         return 50  # Default score if no specific specialties found
     
@@ -29,25 +130,36 @@ def calculate_specialty_match_score(condition, hospital_specialties):
     total_specialties = len(required_specialties)
     
     for required_spec in required_specialties:
-        for hospital_spec in hospital_specialties:
-            # Exact match
-            if required_spec.lower() == hospital_spec.lower():
-                match_count += 1
-                break
-            # Partial match
-            elif (required_spec.lower() in hospital_spec.lower() or 
-                  hospital_spec.lower() in required_spec.lower()):
-                match_count += 0.7
-                break
-            # Related specialty match
-            elif are_related_specialties(required_spec, hospital_spec):
-                match_count += 0.5
-                break
+        match_count += specialty_match_weight(required_spec, hospital_specialties)
     
     # Calculate percentage match
     match_percentage = (match_count / total_specialties) * 100
     return min(100, max(0, match_percentage))
 
+def specialty_match_weight(required_spec, hospital_specialties):
+    """
+    Weigh how well a hospital covers one required specialty.
+    
+    The first hospital specialty that matches in any way decides the weight.
+    
+    Args:
+        required_spec: Specialty needed for the condition
+        hospital_specialties: List of hospital specialties
+    
+    Returns:
+        1 for an exact match, 0.7 for a partial match, 0.5 for a related
+        specialty and 0 if nothing matches
+    """
+    # Exact, partial and related matches are precomputed between specialty IDs
+    required_id = SPECIALTIES.intern(required_spec)
+    hospital_ids = [SPECIALTIES.intern(spec) for spec in hospital_specialties]
+    similarity = SPECIALTIES.similarity
+    for hospital_id in hospital_ids:
+        level = similarity[required_id, hospital_id]
+        if level:
+            return LEVEL_WEIGHTS[level]
+    return 0
+
 def are_related_specialties(spec1, spec2):
     """
     Check if two medical specialties are related.
@@ -59,31 +171,7 @@ def are_related_specialties(spec1, spec2):
     Returns:
         Boolean indicating if specialties are related
     """
-    # Define related specialty groups
-    related_groups = [
-        ["Cardiology", "Cardiac Surgery", "Cardiovascular Surgery"],
-        ["Neurology", "Neurosurgery", "Neurological Surgery"],
-        ["Orthopedics", "Orthopedic Surgery", "Sports Medicine"],
-        ["Gastroenterology", "Hepatology", "GI Surgery"],
-        ["Oncology", "Surgical Oncology", "Medical Oncology", "Radiation Therapy"],
-        ["Urology", "Nephrology", "Kidney Transplant"],
-        ["Obstetrics", "Gynecology", "Reproductive Medicine"],
-        ["Pediatrics", "Neonatology", "Pediatric Surgery"],
-        ["Internal Medicine", "General Medicine", "Family Medicine"],
-        ["Emergency Medicine", "Trauma Surgery", "Critical Care"],
-        ["Psychiatry", "Psychology", "Mental Health"],
-        ["Pulmonology", "Respiratory Medicine", "Thoracic Surgery"]
-    ]
-    
-    spec1_lower = spec1.lower()
-    spec2_lower = spec2.lower()
-    
-    for group in related_groups:
-        group_lower = [s.lower() for s in group]
-        if spec1_lower in group_lower and spec2_lower in group_lower:
-            return True
-    
-    return False
+    return SPECIALTIES.are_related(spec1, spec2)
 
 def calculate_accessibility_score(hospital, user_location, hospital_type_preference):
     """
@@ -142,62 +230,288 @@ def calculate_quality_score(hospital):
     total_score = rating_score + nabh_bonus + gov_bonus + emergency_bonus
     return min(100, total_score)
 
-def calculate_ai_score(condition, hospital, user_location, preferences):
+def resolve_query(condition, preferences):
     """
-    Calculate comprehensive AI matching score for hospital-condition pair.
+    Resolve the condition-level inputs shared by every hospital in a query.
     
     Args:
         condition: Medical condition
-        hospital: Hospital dictionary
-        user_location: User coordinates
         preferences: User preferences dictionary
     
     Returns:
-        Overall AI score from 0 to 100
+        QueryContext
     """
-    # Weight factors for different components
-    weights = {
-        'specialty_match': 0.4,
-        'quality': 0.3,
-        'accessibility': 0.2,
-        'distance': 0.1
-    }
-    
-    # Calculate component scores
-    specialty_score = calculate_specialty_match_score(condition, hospital['specialties'])
-    quality_score = calculate_quality_score(hospital)
-    accessibility_score = calculate_accessibility_score(
-        hospital, user_location, preferences.get('hospital_type', ['Government', 'Private'])
+    return QueryContext(
+        required_specialties=get_condition_specialties(condition),
+        is_emergency=is_emergency_condition(condition),
+        hospital_types=preferences.get('hospital_type', ['Government', 'Private']),
+        max_distance=preferences.get('max_distance', 50)
     )
+
+def score_hospital(context, hospital, distance, quality_score=None, accessibility_score=None,
+                   specialty_score=None):
+    """
+    Compute every score component for one hospital exactly once.
     
-    # Distance score (closer is better, max distance affects score)
-    if user_location and 'latitude' in hospital and 'longitude' in hospital:
-        distance = calculate_distance(
-            user_location, 
-            (hospital['latitude'], hospital['longitude'])
+    Args:
+        context: QueryContext from resolve_query
+        hospital: Hospital dictionary
+        distance: Distance to the user in km, or None if unknown
+        quality_score: Precomputed quality score, computed if None
+        accessibility_score: Precomputed accessibility score, computed if None
+        specialty_score: Precomputed specialty match score, computed if None
+    
+    Returns:
+        ScoreBreakdown with the weighted AI score and its components
+    """
+    if specialty_score is None:
+        specialty_score = score_specialties(context.required_specialties, hospital['specialties'])
+    if quality_score is None:
+        quality_score = calculate_quality_score(hospital)
+    if accessibility_score is None:
+        accessibility_score = calculate_accessibility_score(
+            hospital, None, context.hospital_types
         )
-        max_distance = preferences.get('max_distance', 50)
-        distance_score = max(0, 100 - (distance / max_distance) * 100)
+    
+    # Distance score (closer is better, max distance affects score)
+    if distance is not None:
+        distance_score = max(0, 100 - (distance / context.max_distance) * 100)
     else:
         distance_score = 50  # Default if distance can't be calculated
     
     # Emergency condition bonus
     emergency_bonus = 0
-    if is_emergency_condition(condition) and hospital.get('emergency_services', False):
+    if context.is_emergency and hospital.get('emergency_services', False):
         emergency_bonus = 10
     
     # Calculate weighted score
     weighted_score = (
-        specialty_score * weights['specialty_match'] +
-        quality_score * weights['quality'] +
-        accessibility_score * weights['accessibility'] +
-        distance_score * weights['distance'] +
+        specialty_score * SCORE_WEIGHTS['specialty_match'] +
+        quality_score * SCORE_WEIGHTS['quality'] +
+        accessibility_score * SCORE_WEIGHTS['accessibility'] +
+        distance_score * SCORE_WEIGHTS['distance'] +
         emergency_bonus
     )
     
-    return min(100, max(0, weighted_score))
+    return ScoreBreakdown(
+        ai_score=min(100, max(0, weighted_score)),
+        specialty_score=specialty_score,
+        quality_score=quality_score,
+        accessibility_score=accessibility_score,
+        distance_score=distance_score,
+        emergency_bonus=emergency_bonus
+    )
+
+def calculate_ai_score(condition, hospital, user_location, preferences):
+    """
+    Calculate comprehensive AI matching score for hospital-condition pair.
+    
+    Args:
+        condition: Medical condition
+        hospital: Hospital dictionary
+        user_location: User coordinates
+        preferences: User preferences dictionary
+    
+    Returns:
+        Overall AI score from 0 to 100
+    """
+    distance = None
+    if user_location and 'latitude' in hospital and 'longitude' in hospital:
+        distance = calculate_distance(
+            user_location, 
+            (hospital['latitude'], hospital['longitude'])
+        )
+    
+    return score_hospital(resolve_query(condition, preferences), hospital, distance).ai_score
+
+# Precompute for the loaded hospital data now and again on every reload
+register_reload_hook(prepare_store)
 
-def match_hospitals_to_condition(condition, user_location_str, hospital_types, min_rating, max_distance):
+def _score_candidates(condition, user_coordinates, hospital_types, min_rating, max_distance, store,
+                      stats=None, min_results=None, max_radius=MAX_EXPANDED_RADIUS_KM):
+    """
+    Score every hospital within distance that passes the type and rating filters.
+    
+    Without user coordinates every hospital passing the filters is scored
+    with an unknown distance. With min_results set, the radius doubles until
+    enough hospitals qualify or it reaches max_radius. Distance scores stay
+    relative to max_distance, so hospitals found beyond it score 0 for distance.
+    
+    Returns:
+        List of (store row, distance, ScoreBreakdown) tuples in distance order
+    """
+    filter_timer = start_timer('filter')
+    radius = max_distance
+    radius_used = max_distance  # Smallest radius holding the hospitals found
+    found = None
+    while True:
+        # Apply the type, rating, bounding box and distance filters cheapest first
+        plan = plan_query(
+            store, user_coordinates, radius, hospital_types, min_rating,
+            get_city_distance_table(store)
+        )
+        nearby_hospitals = execute_plan(plan, store, get_spatial_index(store), stats)
+        if found is not None and len(nearby_hospitals) > found:
+            radius_used = radius
+        found = len(nearby_hospitals)
+        if (user_coordinates is None or not min_results or
+                len(nearby_hospitals) >= min_results or radius >= max_radius):
+            break
+        radius = min(radius * 2, max_radius)
+        increment('radius_expansions')
+    filter_timer.stop()
+    
+    if stats is not None and user_coordinates is not None:
+        stats['radius_used'] = radius_used
+    
+    scoring_timer = start_timer('scoring')
+    
+    # Resolve the condition once, then score each hospital in a single pass
+    context = resolve_query(condition, {
+        'hospital_type': hospital_types,
+        'max_distance': max_distance,
+        'min_rating': min_rating
+    })
+    
+    quality_scores = get_quality_scores(store)
+    accessibility_scores = get_accessibility_scores(store, hospital_types)
+    
+    # Known conditions gather their specialty scores from the materialized
+    # matrix; other conditions are scored from the specialty ID matrix
+    rows = [row for row, _ in nearby_hospitals]
+    specialty_scores = get_specialty_matrix(store).scores(context.required_specialties, rows)
+    if specialty_scores is not None:
+        increment('specialty_matrix_hits')
+    elif context.required_specialties:
+        specialty_scores = score_rows(store, context.required_specialties, rows)
+    
+    scored_hospitals = []
+    for position, (row, distance) in enumerate(nearby_hospitals):
+        scores = score_hospital(
+            context, store.records[row], distance,
+            quality_score=float(quality_scores[row]),
+            accessibility_score=float(accessibility_scores[row]),
+            specialty_score=None if specialty_scores is None else float(specialty_scores[position])
+        )
+        scored_hospitals.append((row, distance, scores))
+    
+    increment('hospitals_scored', len(scored_hospitals))
+    scoring_timer.stop()
+    return scored_hospitals
+
+def rank_hospitals(condition, user_coordinates, hospital_types, min_rating, max_distance,
+                   store=None, top_k=None, stats=None, min_results=None,
+                   max_radius=MAX_EXPANDED_RADIUS_KM):
+    """
+    Score the hospitals around a location without building result dictionaries.
+    
+    Args:
+        condition: Medical condition string
+        user_coordinates: Tuple of (latitude, longitude), or None to rank
+            without distances
+        hospital_types: List of preferred hospital types
+        min_rating: Minimum hospital rating
+        max_distance: Maximum distance in kilometers
+        store: HospitalStore to search (defaults to the loaded data)
+        top_k: Only return the k best hospitals, selected with a bounded
+            heap instead of a full sort
+        stats: Optional dictionary that receives the query plan, the
+            number of hospitals each filter stage dropped and the smallest
+            radius holding the hospitals found ('radius_used')
+        min_results: Widen the search radius until at least this many
+            hospitals qualify
+        max_radius: Largest radius in kilometers a widened search may use
+    
+    Returns:
+        List of (store row, distance, ScoreBreakdown) tuples, best first
+    """
+    store = store or get_hospital_store()
+    scored_hospitals = _score_candidates(
+        condition, user_coordinates, hospital_types, min_rating, max_distance, store, stats,
+        min_results, max_radius
+    )
+    
+    # Rank by AI score (descending) and then by rating; both nlargest and the
+    # stable sort keep equally ranked hospitals in distance order
+    rank_key = lambda x: (x[2].ai_score, store.rating[x[0]])
+    with start_timer('sort'):
+        if top_k is not None:
+            return heapq.nlargest(top_k, scored_hospitals, key=rank_key)
+        
+        scored_hospitals.sort(key=rank_key, reverse=True)
+        return scored_hospitals
+
+def iter_ranked_hospitals(condition, user_coordinates, hospital_types, min_rating, max_distance,
+                          store=None):
+    """
+    Lazily yield the hospitals around a location in rank order.
+    
+    Every candidate is scored up front, but ordering work is only done for
+    the results actually consumed.
+    
+    Yields:
+        (store row, distance, ScoreBreakdown) tuples, best first
+    """
+    store = store or get_hospital_store()
+    scored_hospitals = _score_candidates(
+        condition, user_coordinates, hospital_types, min_rating, max_distance, store
+    )
+    
+    # Position breaks ties so equally ranked hospitals keep distance order
+    heap = [
+        (-scores.ai_score, -store.rating[row], position, row, distance, scores)
+        for position, (row, distance, scores) in enumerate(scored_hospitals)
+    ]
+    heapq.heapify(heap)
+    while heap:
+        _, _, _, row, distance, scores = heapq.heappop(heap)
+        yield row, distance, scores
+
+def pack_rankings(rankings):
+    """
+    Convert rankings into compact per-query arrays.
+    
+    Args:
+        rankings: List from rank_hospitals
+    
+    Returns:
+        Dictionary of NumPy arrays keyed by 'row', 'distance' and the
+        ScoreBreakdown field names, in rank order
+    """
+    packed = {
+        'row': np.array([row for row, _, _ in rankings], dtype=np.int64),
+        'distance': np.array([distance for _, distance, _ in rankings], dtype=float)
+    }
+    for position, field in enumerate(ScoreBreakdown._fields):
+        packed[field] = np.array([scores[position] for _, _, scores in rankings], dtype=float)
+    return packed
+
+def materialize_rankings(packed, store=None, positions=None):
+    """
+    Build hospital dictionaries for packed rankings.
+    
+    Args:
+        packed: Dictionary from pack_rankings
+        store: HospitalStore the rows refer to (defaults to the loaded data)
+        positions: Rank positions to build (defaults to all)
+    
+    Returns:
+        List of hospital dictionaries with distance and score fields
+    """
+    store = store or get_hospital_store()
+    if positions is None:
+        positions = range(len(packed['row']))
+    
+    hospitals = []
+    for position in positions:
+        distance = float(packed['distance'][position])
+        scores = {field: float(packed[field][position]) for field in ScoreBreakdown._fields}
+        hospitals.append(store.materialize(packed['row'][position], **get_distance_info(distance), **scores))
+    return hospitals
+
+def match_hospitals_to_condition(condition, user_location_str, hospital_types, min_rating, max_distance,
+                                 top_k=None, stats=None, min_results=None,
+                                 max_radius=MAX_EXPANDED_RADIUS_KM, parallel=False):
     """
     Main function to match hospitals to a medical condition using AI scoring.
     
@@ -207,85 +521,204 @@ def match_hospitals_to_condition(condition, user_location_str, hospital_types, m
         hospital_types: List of preferred hospital types
         min_rating: Minimum hospital rating
         max_distance: Maximum distance in kilometers
+        top_k: Only return the k best matches
+        stats: Optional dictionary that receives the query plan, the
+            number of hospitals each filter stage dropped and the smallest
+            radius holding the hospitals found ('radius_used')
+        min_results: Widen the search radius until at least this many
+            hospitals qualify
+        max_radius: Largest radius in kilometers a widened search may use
+        parallel: Score large stores in shards on a process pool; searches
+            collecting stats or widening their radius still run serially
     
     Returns:
         List of matched hospitals with AI scores, sorted by score
     """
+    store = get_hospital_store()
     user_coordinates = get_coordinates(user_location_str)
     
     if not user_coordinates:
-        # If we can't get user coordinates, return all hospitals meeting basic criteria
-        filtered_hospitals = []
-        for hospital in HOSPITALS_DATA:
-            if (hospital['type'] in hospital_types and 
-                hospital['rating'] >= min_rating):
-                filtered_hospitals.append(hospital)
-        return filtered_hospitals[:20]
-    
-    # Find hospitals within distance
-    nearby_hospitals = find_nearest_hospitals(
-        user_coordinates, 
-        HOSPITALS_DATA, 
-        max_distance
-    )
+        # If we can't get user coordinates, rank the hospitals meeting the
+        # basic criteria without distance
+        rankings = rank_hospitals(
+            condition, None, hospital_types, min_rating, max_distance, store,
+            top_k if top_k is not None else FALLBACK_RESULTS, stats
+        )
+        return [store.materialize(row, **scores._asdict()) for row, _, scores in rankings]
     
-    # Apply rating and type filters
-    filtered_hospitals = []
-    for hospital in nearby_hospitals:
-        if (hospital['type'] in hospital_types and 
-            hospital['rating'] >= min_rating):
-            filtered_hospitals.append(hospital)
+    if parallel and stats is None and min_results is None:
+        # Imported here because utils.parallel builds on this module
+        from utils.parallel import rank_hospitals_parallel
+        rankings = rank_hospitals_parallel(
+            condition, user_coordinates, hospital_types, min_rating, max_distance, store, top_k
+        )
+    else:
+        rankings = rank_hospitals(
+            condition, user_coordinates, hospital_types, min_rating, max_distance, store, top_k,
+            stats, min_results, max_radius
+        )
     
-    # Calculate AI scores
-    preferences = {
-        'hospital_type': hospital_types,
-        'max_distance': max_distance,
-        'min_rating': min_rating
-    }
+    # Only now build full hospital dictionaries for the ranked results
+    return [
+        store.materialize(row, **get_distance_info(distance), **scores._asdict())
+        for row, distance, scores in rankings
+    ]
+
+def iter_matched_hospitals(condition, user_location_str, hospital_types, min_rating, max_distance):
+    """
+    Generator variant of match_hospitals_to_condition.
     
-    scored_hospitals = []
-    for hospital in filtered_hospitals:
-        # Calculate individual component scores
-        specialty_score = calculate_specialty_match_score(condition, hospital['specialties'])
-        quality_score = calculate_quality_score(hospital)
-        accessibility_score = calculate_accessibility_score(
-            hospital, user_coordinates, preferences.get('hospital_type', ['Government', 'Private'])
-        )
-        
-        # Calculate distance score
-        if user_coordinates and 'latitude' in hospital and 'longitude' in hospital:
-            distance = calculate_distance(
-                user_coordinates, 
-                (hospital['latitude'], hospital['longitude'])
+    Yields matched hospitals one at a time in rank order, so callers only pay
+    for ranking and building the results they consume. If the location cannot
+    be geocoded, hospitals are ranked without distance.
+    
+    Yields:
+        Hospital dictionaries with AI scores, best first
+    """
+    store = get_hospital_store()
+    user_coordinates = get_coordinates(user_location_str) or None
+    
+    for row, distance, scores in iter_ranked_hospitals(
+        condition, user_coordinates, hospital_types, min_rating, max_distance, store
+    ):
+        if distance is None:
+            yield store.materialize(row, **scores._asdict())
+        else:
+            yield store.materialize(row, **get_distance_info(distance), **scores._asdict())
+
+def _specialty_scores(store, required_specialties, rows):
+    """Get the specialty match scores of some store rows for one condition"""
+    if not required_specialties:
+        return np.full(len(rows), 50.0)
+    scores = get_specialty_matrix(store).scores(required_specialties, rows)
+    if scores is None:
+        scores = score_rows(store, required_specialties, rows)
+    return scores
+
+def match_hospitals_batch(queries):
+    """
+    Match hospitals for many searches at once.
+    
+    Each distinct location is geocoded and each distinct condition resolved
+    once, distances from all distinct origins are computed as one
+    vectorized matrix (in blocks of BATCH_DISTANCE_CELLS), and every search
+    is scored with array operations. Results are the same as calling
+    match_hospitals_to_condition for each search.
+    
+    Args:
+        queries: List of dictionaries with the arguments of
+            match_hospitals_to_condition: 'condition', 'location',
+            'hospital_types', 'min_rating' and 'max_distance', and optionally
+            'top_k', 'min_results' and 'max_radius'
+    
+    Returns:
+        List with the matched hospitals of each query, in query order
+    """
+    store = get_hospital_store()
+    results = [None] * len(queries)
+    
+    locations = {query['location'] for query in queries}
+    coordinates = {location: get_coordinates(location) for location in locations}
+    
+    # Searches that cannot be geocoded take the unscored-distance fallback
+    queries_by_origin = {}
+    for position, query in enumerate(queries):
+        origin = coordinates[query['location']]
+        if not origin:
+            results[position] = match_hospitals_to_condition(
+                query['condition'], query['location'], query['hospital_types'],
+                query['min_rating'], query['max_distance'], query.get('top_k')
             )
-            max_distance = preferences.get('max_distance', 50)
-            distance_score = max(0, 100 - (distance / max_distance) * 100)
         else:
-            distance_score = 50
+            queries_by_origin.setdefault(tuple(origin), []).append(position)
+    
+    conditions = {query['condition'] for query in queries}
+    contexts = {condition: resolve_query(condition, {}) for condition in conditions}
+    eligible_masks = {}
+    quality_scores = get_quality_scores(store)
+    
+    origins = list(queries_by_origin)
+    block_size = max(1, BATCH_DISTANCE_CELLS // max(1, len(store)))
+    for block_start in range(0, len(origins), block_size):
+        block = origins[block_start:block_start + block_size]
         
-        # Calculate overall AI score
-        ai_score = calculate_ai_score(
-            condition, 
-            hospital, 
-            user_coordinates, 
-            preferences
-        )
+        # Only measure as far as the widest search from each origin may reach
+        reach = []
+        for origin in block:
+            reach.append(max(
+                max(query['max_distance'], query.get('max_radius', MAX_EXPANDED_RADIUS_KM))
+                if query.get('min_results') else query['max_distance']
+                for query in (queries[position] for position in queries_by_origin[origin])
+            ))
+        distance_matrix = calculate_distance_matrix(block, store.latitude, store.longitude, reach)
         
-        hospital_with_score = hospital.copy()
-        hospital_with_score['ai_score'] = ai_score
-        hospital_with_score['specialty_score'] = specialty_score
-        hospital_with_score['quality_score'] = quality_score
-        hospital_with_score['accessibility_score'] = accessibility_score
-        hospital_with_score['distance_score'] = distance_score
-        scored_hospitals.append(hospital_with_score)
-    
-    # Sort by AI score (descending) and then by rating
-    scored_hospitals.sort(
-        key=lambda x: (x['ai_score'], x['rating']), 
-        reverse=True
-    )
-    
-    return scored_hospitals
+        for origin, distances in zip(block, distance_matrix):
+            for position in queries_by_origin[origin]:
+                query = queries[position]
+                hospital_types = query['hospital_types']
+                min_rating = query['min_rating']
+                
+                filter_key = (frozenset(hospital_types), min_rating)
+                if filter_key not in eligible_masks:
+                    eligible_masks[filter_key] = (
+                        store.type_mask(hospital_types) & (store.rating >= min_rating)
+                    )
+                eligible = eligible_masks[filter_key]
+                
+                # Widen sparse searches exactly as _score_candidates does
+                radius = query['max_distance']
+                min_results = query.get('min_results')
+                max_radius = query.get('max_radius', MAX_EXPANDED_RADIUS_KM)
+                within = eligible & (distances <= radius)
+                while min_results and np.count_nonzero(within) < min_results and radius < max_radius:
+                    radius = min(radius * 2, max_radius)
+                    within = eligible & (distances <= radius)
+                
+                rows = np.flatnonzero(within)
+                rows = rows[np.argsort(distances[rows], kind='stable')]
+                row_distances = distances[rows]
+                
+                # Same arithmetic, in the same order, as score_hospital
+                context = contexts[query['condition']]
+                specialty = _specialty_scores(store, context.required_specialties, rows)
+                quality = quality_scores[rows]
+                accessibility = get_accessibility_scores(store, hospital_types)[rows]
+                distance_score = np.maximum(
+                    0, 100 - (row_distances / query['max_distance']) * 100
+                )
+                emergency_bonus = np.where(
+                    context.is_emergency & store.emergency_services[rows], 10, 0
+                )
+                weighted_score = (
+                    specialty * SCORE_WEIGHTS['specialty_match'] +
+                    quality * SCORE_WEIGHTS['quality'] +
+                    accessibility * SCORE_WEIGHTS['accessibility'] +
+                    distance_score * SCORE_WEIGHTS['distance'] +
+                    emergency_bonus
+                )
+                ai_score = np.minimum(100, np.maximum(0, weighted_score))
+                
+                # Sort by AI score and then rating, keeping ties in distance order
+                order = np.lexsort((-store.rating[rows], -ai_score))
+                if query.get('top_k') is not None:
+                    order = order[:query['top_k']]
+                
+                results[position] = [
+                    store.materialize(
+                        rows[i], **get_distance_info(float(row_distances[i])),
+                        **ScoreBreakdown(
+                            ai_score=float(ai_score[i]),
+                            specialty_score=float(specialty[i]),
+                            quality_score=float(quality[i]),
+                            accessibility_score=float(accessibility[i]),
+                            distance_score=float(distance_score[i]),
+                            emergency_bonus=int(emergency_bonus[i])
+                        )._asdict()
+                    )
+                    for i in order
+                ]
+    
+    return results
 
 def get_hospital_recommendations(condition, location, max_results=10):
     """
@@ -305,11 +738,11 @@ def get_hospital_recommendations(condition, location, max_results=10):
     max_distance = 50
     
     matched_hospitals = match_hospitals_to_condition(
-        condition, location, hospital_types, min_rating, max_distance
+        condition, location, hospital_types, min_rating, max_distance, top_k=max_results
     )
     
     recommendations = []
-    for hospital in matched_hospitals[:max_results]:
+    for hospital in matched_hospitals:
         recommendation = hospital.copy()
         
         # Add recommendation explanation
@@ -5,6 +5,27 @@ Handles coordinate-based distance calculations and travel time estimates.
 
 from geopy.distance import geodesic
 import math
+import numpy as np
+from utils.metrics import increment, timed
+
+# WGS-84 ellipsoid, the same model geopy's geodesic uses by default
+WGS84_MAJOR_AXIS_KM = 6378.137
+WGS84_FLATTENING = 1 / 298.257223563
+WGS84_MINOR_AXIS_KM = WGS84_MAJOR_AXIS_KM * (1 - WGS84_FLATTENING)
+
+# Convergence settings for the vectorized Vincenty solver
+VINCENTY_MAX_ITERATIONS = 100
+VINCENTY_TOLERANCE = 1e-12
+
+# Spherical approximation used to pre-classify points against a radius.
+# Haversine on the mean Earth radius is within 0.57% of the WGS-84 distance
+# anywhere on Earth; the margin below adds headroom plus the 2-decimal rounding.
+MEAN_EARTH_RADIUS_KM = 6371.0088
+APPROXIMATION_RELATIVE_ERROR = 0.006
+APPROXIMATION_ABSOLUTE_ERROR_KM = 0.01
+
+# Hard cap for searches that widen their radius to find enough hospitals
+MAX_EXPANDED_RADIUS_KM = 400
 
 def calculate_distance(coord1, coord2):
     """
@@ -24,16 +45,228 @@ def calculate_distance(coord1, coord2):
         print(f"Error calculating distance: {e}")
         return 0.0
 
+def _vincenty_inverse(lat1, lng1, lat2, lng2):
+    """
+    Solve the inverse geodesic problem on the WGS-84 ellipsoid for arrays.
+    
+    Args:
+        lat1, lng1: Arrays (or scalars) of start coordinates in degrees
+        lat2, lng2: Arrays (or scalars) of end coordinates in degrees, broadcast
+            against the start coordinates
+    
+    Returns:
+        Tuple of (distances in km, boolean array of converged elements)
+    """
+    f = WGS84_FLATTENING
+    a = WGS84_MAJOR_AXIS_KM
+    b = WGS84_MINOR_AXIS_KM
+    
+    reduced_lat1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    reduced_lat2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(reduced_lat1), np.cos(reduced_lat1)
+    sin_u2, cos_u2 = np.sin(reduced_lat2), np.cos(reduced_lat2)
+    
+    lng_delta = np.radians(np.asarray(lng2, dtype=float) - np.asarray(lng1, dtype=float))
+    lam = lng_delta
+    converged = np.zeros(np.broadcast(reduced_lat1, reduced_lat2, lng_delta).shape, dtype=bool)
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(VINCENTY_MAX_ITERATIONS):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            
+            # Coincident points have sin_sigma == 0 and a distance of zero
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # Points on the equator have cos2_alpha == 0
+            cos_2sigma_m = np.where(
+                cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha
+            )
+            c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            
+            lam_previous = lam
+            lam = lng_delta + (1 - c) * f * sin_alpha * (
+                sigma + c * sin_sigma * (
+                    cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+                )
+            )
+            converged = np.abs(lam - lam_previous) <= VINCENTY_TOLERANCE
+            if converged.all():
+                break
+        
+        u2 = cos2_alpha * (a ** 2 - b ** 2) / b ** 2
+        big_a = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        big_b = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = big_b * sin_sigma * (
+            cos_2sigma_m + big_b / 4 * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) -
+                big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+            )
+        )
+        distances = b * big_a * (sigma - delta_sigma)
+    
+    return distances, converged
+
+def calculate_distances(origin, latitudes, longitudes):
+    """
+    Calculate distances from one location to many coordinates in one pass.
+    
+    Uses a vectorized Vincenty solution on the WGS-84 ellipsoid, which agrees
+    with calculate_distance at its 2-decimal rounding. The rare nearly
+    antipodal pairs where Vincenty does not converge fall back to geodesic.
+    
+    Args:
+        origin: Tuple of (latitude, longitude)
+        latitudes: Sequence or array of latitudes
+        longitudes: Sequence or array of longitudes, same length as latitudes
+    
+    Returns:
+        NumPy array of distances in kilometers; NaN where a coordinate is
+        missing or out of range
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    origin_lat, origin_lng = float(origin[0]), float(origin[1])
+    
+    distances, converged = _vincenty_inverse(origin_lat, origin_lng, latitudes, longitudes)
+    distances = np.array(distances, dtype=float)
+    
+    valid = (np.isfinite(latitudes) & np.isfinite(longitudes) &
+             (np.abs(latitudes) <= 90) & (abs(origin_lat) <= 90))
+    for i in np.flatnonzero(valid & ~converged):
+        distances[i] = geodesic(origin, (latitudes[i], longitudes[i])).kilometers
+    distances[~valid] = np.nan
+    
+    return np.round(distances, 2)
+
+def _haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distances in km between broadcast arrays of coordinates"""
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    lng_delta = np.radians(np.asarray(lng2, dtype=float) - np.asarray(lng1, dtype=float))
+    
+    h = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin(lng_delta / 2) ** 2)
+    return 2 * MEAN_EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+def approximate_distances(origin, latitudes, longitudes):
+    """
+    Estimate distances from one location to many coordinates with haversine.
+    
+    Much cheaper than calculate_distances, and within
+    APPROXIMATION_RELATIVE_ERROR of it.
+    
+    Args:
+        origin: Tuple of (latitude, longitude)
+        latitudes: Sequence or array of latitudes
+        longitudes: Sequence or array of longitudes, same length as latitudes
+    
+    Returns:
+        NumPy array of unrounded distances in kilometers; NaN where a
+        coordinate is missing
+    """
+    return _haversine(
+        float(origin[0]), float(origin[1]),
+        np.asarray(latitudes, dtype=float), np.asarray(longitudes, dtype=float)
+    )
+
+def calculate_distance_matrix(origins, latitudes, longitudes, max_distance=None):
+    """
+    Calculate distances from several locations to many coordinates at once.
+    
+    Exact distances agree with calculate_distances. With max_distance set,
+    pairs the haversine estimate puts clearly beyond it are not measured.
+    
+    Args:
+        origins: Sequence of (latitude, longitude) tuples
+        latitudes: Sequence or array of latitudes
+        longitudes: Sequence or array of longitudes, same length as latitudes
+        max_distance: Optional distance in km beyond which pairs need not be
+            measured; a scalar or one value per origin
+    
+    Returns:
+        NumPy array with one row per origin and one column per coordinate;
+        inf for pairs left unmeasured and NaN where a coordinate is missing
+        or out of range
+    """
+    origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+    origin_lats, origin_lngs = origins[:, :1], origins[:, 1:]
+    latitudes = np.asarray(latitudes, dtype=float)[np.newaxis, :]
+    longitudes = np.asarray(longitudes, dtype=float)[np.newaxis, :]
+    
+    valid = (np.isfinite(latitudes) & np.isfinite(longitudes) &
+             (np.abs(latitudes) <= 90) & (np.abs(origin_lats) <= 90))
+    measure = valid.copy()
+    if max_distance is not None:
+        with np.errstate(invalid="ignore"):
+            estimates = _haversine(origin_lats, origin_lngs, latitudes, longitudes)
+            max_distance = np.asarray(max_distance, dtype=float).reshape(-1, 1)
+            measure &= (estimates * (1 - APPROXIMATION_RELATIVE_ERROR) -
+                        APPROXIMATION_ABSOLUTE_ERROR_KM) <= max_distance
+    
+    distances = np.full(valid.shape, np.inf)
+    distances[~valid] = np.nan
+    
+    rows, columns = np.nonzero(measure)
+    measured, converged = _vincenty_inverse(
+        origins[rows, 0], origins[rows, 1], latitudes[0, columns], longitudes[0, columns]
+    )
+    measured = np.array(measured, dtype=float)
+    for i in np.flatnonzero(~converged):
+        measured[i] = geodesic(tuple(origins[rows[i]]), (latitudes[0, columns[i]], longitudes[0, columns[i]])).kilometers
+    distances[rows, columns] = np.round(measured, 2)
+    
+    return distances
+
+def distances_within(origin, latitudes, longitudes, radius_km, approximate=True):
+    """
+    Find the coordinates within a radius of a location, with exact distances.
+    
+    In approximate mode every point is first classified with the cheap
+    haversine estimate; only points that are not clearly outside the radius
+    (including those within the error margin of it) are measured exactly.
+    The result is the same as measuring every point exactly.
+    
+    Args:
+        origin: Tuple of (latitude, longitude)
+        latitudes: Sequence or array of latitudes
+        longitudes: Sequence or array of longitudes, same length as latitudes
+        radius_km: Search radius in kilometers
+        approximate: Skip exact distances for points clearly outside the radius
+    
+    Returns:
+        Tuple of (ascending positions of the points within the radius, their
+        distances as returned by calculate_distances)
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    
+    if approximate:
+        estimates = approximate_distances(origin, latitudes, longitudes)
+        lower_bounds = (estimates * (1 - APPROXIMATION_RELATIVE_ERROR) -
+                        APPROXIMATION_ABSOLUTE_ERROR_KM)
+        positions = np.flatnonzero(lower_bounds <= radius_km)
+    else:
+        positions = np.arange(len(latitudes))
+    
+    increment('candidates_scanned', len(latitudes))
+    increment('exact_distances', len(positions))
+    distances = calculate_distances(origin, latitudes[positions], longitudes[positions])
+    within = distances <= radius_km
+    return positions[within], distances[within]
+
 def calculate_travel_time(distance_km, mode="car"):
     """
     Estimate travel time based on distance and mode of transport.
     
     Args:
-        distance_km: Distance in kilometers
+        distance_km: Distance in kilometers, or an array of distances
         mode: Mode of transport ("car", "bike", "walk", "public_transport")
     
     Returns:
-        Travel time in minutes
+        Travel time in minutes (an array when given an array)
     """
     # Average speeds in km/h for different modes in Indian conditions
     speeds = {
@@ -45,6 +278,9 @@ def calculate_travel_time(distance_km, mode="car"):
     }
     
     speed = speeds.get(mode, 25)
+    if np.ndim(distance_km) > 0:
+        return np.round(np.asarray(distance_km, dtype=float) / speed * 60, 0)
+    
     time_hours = distance_km / speed
     time_minutes = time_hours * 60
     
@@ -55,11 +291,20 @@ def get_distance_category(distance_km):
     Categorize distance into ranges.
     
     Args:
-        distance_km: Distance in kilometers
+        distance_km: Distance in kilometers, or an array of distances
     
     Returns:
-        String category ("Very Near", "Near", "Moderate", "Far", "Very Far")
+        String category ("Very Near", "Near", "Moderate", "Far", "Very Far"),
+        or an array of categories when given an array
     """
+    if np.ndim(distance_km) > 0:
+        distances = np.asarray(distance_km, dtype=float)
+        return np.select(
+            [distances <= 2, distances <= 5, distances <= 15, distances <= 30],
+            ["Very Near", "Near", "Moderate", "Far"],
+            default="Very Far"
+        )
+    
     if distance_km <= 2:
         return "Very Near"
     elif distance_km <= 5:
@@ -71,40 +316,104 @@ def get_distance_category(distance_km):
     else:
         return "Very Far"
 
-def find_nearest_hospitals(user_location, hospitals, max_distance=50):
+def get_distance_info(distance_km):
+    """
+    Get the distance and travel time fields shown for a hospital.
+    
+    Args:
+        distance_km: Distance in kilometers
+    
+    Returns:
+        Dictionary with distance, distance_category, travel_time_car and
+        travel_time_public
+    """
+    return {
+        'distance': distance_km,
+        'distance_category': get_distance_category(distance_km),
+        'travel_time_car': calculate_travel_time(distance_km, "car"),
+        'travel_time_public': calculate_travel_time(distance_km, "public_transport")
+    }
+
+def _with_distance_info(hospital, distance):
+    """Copy a hospital dictionary and add distance and travel time fields"""
+    hospital_with_distance = hospital.copy()
+    hospital_with_distance.update(get_distance_info(distance))
+    return hospital_with_distance
+
+@timed('distance_scan')
+def find_nearest_hospitals(user_location, hospitals, max_distance=50, index=None, approximate=True,
+                           min_results=None, max_radius=MAX_EXPANDED_RADIUS_KM, stats=None):
     """
     Find hospitals within a specified distance from user location.
     
+    With min_results set, a search that finds fewer hospitals keeps doubling
+    its radius until it finds enough of them or reaches max_radius.
+    
     Args:
         user_location: Tuple of (latitude, longitude)
         hospitals: List of hospital dictionaries with latitude and longitude
         max_distance: Maximum distance in kilometers
+        index: Optional spatial index built over hospitals with
+            utils.spatial_index.build_spatial_index; without one every
+            hospital is checked
+        approximate: Rule out hospitals clearly beyond max_distance with a
+            cheap estimate before measuring exact distances
+        min_results: Widen the search until at least this many hospitals
+            are found
+        max_radius: Largest radius in kilometers a widened search may use
+        stats: Optional dictionary that receives the smallest radius
+            holding the hospitals found under 'radius_used'
     
     Returns:
         List of hospitals with distance information, sorted by distance
     """
-    nearby_hospitals = []
+    if index is not None:
+        matches, radius_used = index.query_expanding(
+            user_location, max_distance, min_results or 0, max_radius, approximate=approximate
+        )
+        if stats is not None:
+            stats['radius_used'] = radius_used
+        return [
+            _with_distance_info(hospitals[hospital_id], distance)
+            for hospital_id, distance in matches
+        ]
     
-    for hospital in hospitals:
+    hospital_ids = []
+    latitudes = []
+    longitudes = []
+    for hospital_id, hospital in enumerate(hospitals):
         try:
-            hospital_location = (hospital['latitude'], hospital['longitude'])
-            distance = calculate_distance(user_location, hospital_location)
-            
-            if distance <= max_distance:
-                hospital_with_distance = hospital.copy()
-                hospital_with_distance['distance'] = distance
-                hospital_with_distance['distance_category'] = get_distance_category(distance)
-                hospital_with_distance['travel_time_car'] = calculate_travel_time(distance, "car")
-                hospital_with_distance['travel_time_public'] = calculate_travel_time(distance, "public_transport")
-                nearby_hospitals.append(hospital_with_distance)
-        
+            latitudes.append(float(hospital['latitude']))
+            longitudes.append(float(hospital['longitude']))
+            hospital_ids.append(hospital_id)
         except Exception as e:
             print(f"Error processing hospital {hospital.get('name', 'Unknown')}: {e}")
             continue
     
-    # Sort by distance
-    nearby_hospitals.sort(key=lambda x: x['distance'])
-    return nearby_hospitals
+    within, distances = distances_within(
+        user_location, latitudes, longitudes, max_distance, approximate
+    )
+    
+    radius_used = max_distance
+    if min_results and len(within) < min_results and max_distance < max_radius:
+        # Measure everything once, then find the first doubling that has enough
+        all_distances = calculate_distances(user_location, latitudes, longitudes)
+        radii = [max_distance]
+        while np.count_nonzero(all_distances <= radii[-1]) < min_results and radii[-1] < max_radius:
+            radii.append(min(radii[-1] * 2, max_radius))
+        within = np.flatnonzero(all_distances <= radii[-1])
+        # Report the first doubling that already held every hospital found
+        radius_used = next(r for r in radii if np.count_nonzero(all_distances <= r) == len(within))
+        distances = all_distances[within]
+    if stats is not None:
+        stats['radius_used'] = radius_used
+    
+    # Sort by distance, keeping ties in their original order
+    order = np.argsort(distances, kind="stable")
+    return [
+        _with_distance_info(hospitals[hospital_ids[within[i]]], float(distances[i]))
+        for i in order
+    ]
 
 def calculate_area_coverage(center_location, radius_km):
     """
@@ -139,15 +448,17 @@ def is_within_bounds(location, bounds):
     Check if a location is within specified geographical bounds.
     
     Args:
-        location: Tuple of (latitude, longitude)
+        location: Tuple of (latitude, longitude); may also be a tuple of
+            latitude and longitude arrays
         bounds: Dictionary with lat_min, lat_max, lng_min, lng_max
     
     Returns:
-        Boolean indicating if location is within bounds
+        Boolean indicating if location is within bounds (a boolean array
+        for array input)
     """
     lat, lng = location
-    return (bounds['lat_min'] <= lat <= bounds['lat_max'] and 
-            bounds['lng_min'] <= lng <= bounds['lng_max'])
+    return ((bounds['lat_min'] <= lat) & (lat <= bounds['lat_max']) & 
+            (bounds['lng_min'] <= lng) & (lng <= bounds['lng_max']))
 
 def get_distance_text(distance_km):
     """
@@ -0,0 +1,241 @@
+"""
+Two-tier cache for geocoding results.
+An in-process LRU sits in front of an on-disk SQLite store that is shared by
+every worker process on the machine. Failed lookups are cached too, with a
+shorter lifetime, so unknown places do not hit the geocoding service on
+every search.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# How long results are kept, in seconds
+POSITIVE_TTL_SECONDS = 30 * 24 * 3600  # Found coordinates
+NEGATIVE_TTL_SECONDS = 24 * 3600       # Place not found by the geocoder
+ERROR_TTL_SECONDS = 60                 # Geocoder error or timeout
+
+# Entries held by the in-process tier
+MEMORY_CACHE_SIZE = 1024
+
+# On-disk cache location; set the environment variable to an empty string to
+# keep the cache in memory only
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "hospital_finder", "geocache.sqlite3"
+)
+CACHE_PATH_ENV = "HOSPITAL_FINDER_GEOCACHE_PATH"
+
+
+def normalize_location_key(location_string):
+    """
+    Normalize a location string into a cache key.
+
+    Lower-cases the text, collapses whitespace and tidies spacing around
+    commas, so "Sector 44 ,Gurgaon" and "sector 44, gurgaon" share a key.
+
+    Args:
+        location_string: Location as typed by the user
+
+    Returns:
+        Normalized key string
+    """
+    key = " ".join(location_string.lower().split())
+    key = re.sub(r"\s*,\s*", ", ", key)
+    return key.strip(", ")
+
+
+class GeocodeCache:
+    """
+    In-process LRU plus SQLite (WAL mode) cache of geocoding results.
+
+    Cached values are (latitude, longitude) tuples, or None for a lookup
+    that failed. Counters for hits and misses are kept in the stats dict.
+    """
+
+    def __init__(self, path=None, memory_size=MEMORY_CACHE_SIZE, clock=time.time):
+        self.path = path
+        self.memory_size = memory_size
+        self.clock = clock
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "disk_errors": 0,
+        }
+
+        if self.path:
+            try:
+                self._connection()
+            except (sqlite3.Error, OSError) as e:
+                self._disable_disk(e)
+
+    def _disable_disk(self, error):
+        """Fall back to the in-memory tier when the cache file cannot be opened"""
+        print(f"Geocode cache disabled, cannot open {self.path}: {error}")
+        self.path = None
+
+    def _connection(self):
+        """Get this thread's SQLite connection, opening it on first use"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            path = self.path
+            if not path:
+                # Another thread disabled the on-disk tier meanwhile
+                raise OSError("on-disk tier disabled")
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS geocache ("
+                "key TEXT PRIMARY KEY, latitude REAL, longitude REAL, expires_at REAL NOT NULL)"
+            )
+            connection.commit()
+            self._local.connection = connection
+        return connection
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _count(self, counter):
+        with self._lock:
+            self.stats[counter] += 1
+
+    def get(self, key):
+        """
+        Look up a normalized key.
+
+        Args:
+            key: Key from normalize_location_key
+
+        Returns:
+            Tuple of (found, value) where value is a (latitude, longitude)
+            tuple, or None for a cached failure
+        """
+        now = self.clock()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                if entry[0] is None:
+                    self.stats["negative_hits"] += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._memory[key]
+
+        if self.path:
+            try:
+                row = self._connection().execute(
+                    "SELECT latitude, longitude, expires_at FROM geocache "
+                    "WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Geocode cache read failed for {key}: {e}")
+                self._count("disk_errors")
+                row = None
+            except OSError as e:
+                self._disable_disk(e)
+                self._count("disk_errors")
+                row = None
+
+            if row is not None:
+                value = None if row[0] is None else (row[0], row[1])
+                self._remember(key, value, row[2])
+                self._count("disk_hits")
+                if value is None:
+                    self._count("negative_hits")
+                return True, value
+
+        self._count("misses")
+        return False, None
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a result for a normalized key.
+
+        Args:
+            key: Key from normalize_location_key
+            value: (latitude, longitude) tuple, or None for a failed lookup
+            ttl: Lifetime in seconds; defaults to POSITIVE_TTL_SECONDS for
+                coordinates and NEGATIVE_TTL_SECONDS for None
+        """
+        if ttl is None:
+            ttl = POSITIVE_TTL_SECONDS if value is not None else NEGATIVE_TTL_SECONDS
+        expires_at = self.clock() + ttl
+
+        self._remember(key, value, expires_at)
+        self._count("stores")
+
+        if self.path:
+            latitude, longitude = value if value is not None else (None, None)
+            try:
+                connection = self._connection()
+                connection.execute(
+                    "INSERT OR REPLACE INTO geocache (key, latitude, longitude, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, latitude, longitude, expires_at)
+                )
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"Geocode cache write failed for {key}: {e}")
+                self._count("disk_errors")
+            except OSError as e:
+                self._disable_disk(e)
+                self._count("disk_errors")
+
+    def purge_expired(self):
+        """Delete expired entries from both tiers"""
+        now = self.clock()
+        with self._lock:
+            for key in [key for key, entry in self._memory.items() if entry[1] <= now]:
+                del self._memory[key]
+        if self.path:
+            try:
+                connection = self._connection()
+                connection.execute("DELETE FROM geocache WHERE expires_at <= ?", (now,))
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"Geocode cache purge failed: {e}")
+                self._count("disk_errors")
+            except OSError as e:
+                self._disable_disk(e)
+                self._count("disk_errors")
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            try:
+                connection = self._connection()
+                connection.execute("DELETE FROM geocache")
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"Geocode cache clear failed: {e}")
+                self._count("disk_errors")
+            except OSError as e:
+                self._disable_disk(e)
+                self._count("disk_errors")
+
+
+def default_cache_path():
+    """Get the on-disk cache path from the environment, or None if disabled"""
+    path = os.environ.get(CACHE_PATH_ENV, DEFAULT_CACHE_PATH)
+    return path or None
@@ -0,0 +1,201 @@
+"""
+Concurrency helpers for network geocoding.
+Coalesces identical concurrent lookups, spaces requests out to respect the
+geocoding service's rate limit and runs query variants in parallel under
+one overall deadline.
+"""
+
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# Outcomes of geocode_with_deadline
+FOUND = "found"
+NOT_FOUND = "not_found"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+# Returned by a lookup that could not start or finish before the deadline
+_DEADLINE_PASSED = object()
+
+
+class RateLimiter:
+    """
+    Spaces calls at least min_interval seconds apart across all threads.
+
+    Slots are handed out in order; a caller whose slot would start after its
+    deadline gets no slot instead of waiting.
+    """
+
+    def __init__(self, min_interval, clock=time.monotonic, sleep=time.sleep):
+        self.min_interval = min_interval
+        self.clock = clock
+        self.sleep = sleep
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None, cancelled=None):
+        """
+        Wait for the next free slot.
+
+        Args:
+            deadline: Monotonic time after which the caller gives up, or None
+            cancelled: Optional threading.Event; once it is set the caller
+                no longer needs the slot, which is handed back if no later
+                caller has taken one since
+
+        Returns:
+            True once the slot is reached, False if it would miss the
+            deadline or the wait was cancelled
+        """
+        with self._lock:
+            if cancelled is not None and cancelled.is_set():
+                return False
+            now = self.clock()
+            slot = max(now, self._next_slot)
+            if deadline is not None and slot > deadline:
+                return False
+            self._next_slot = slot + self.min_interval
+
+        if slot > now:
+            if cancelled is None:
+                self.sleep(slot - now)
+            elif cancelled.wait(slot - now):
+                with self._lock:
+                    if self._next_slot == slot + self.min_interval:
+                        self._next_slot = slot
+                return False
+        return True
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    Callers arriving while a call for the same key is in flight wait for it
+    and share its result (or exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, function):
+        """
+        Run function for key, or wait for the call already running for key.
+
+        Args:
+            key: Hashable identity of the call
+            function: Callable taking no arguments
+
+        Returns:
+            The function's result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def geocode_with_deadline(geocoder, queries, deadline_seconds, executor,
+                          rate_limiter=None, request_timeout=10):
+    """
+    Geocode several variants of a query in parallel under one deadline.
+
+    Variants are listed in order of preference: the first one that returns a
+    location wins, and a later variant is only used once every earlier one
+    has finished without a result (or could not finish in time).
+
+    Args:
+        geocoder: Object with a geopy-style geocode(query, timeout=...) method
+        queries: Query strings in order of preference
+        deadline_seconds: Overall time budget in seconds
+        executor: concurrent.futures executor used to run the lookups
+        rate_limiter: Optional RateLimiter shared by all lookups
+        request_timeout: Upper bound for a single request in seconds
+
+    Returns:
+        Tuple of ((latitude, longitude) or None, outcome), where outcome is
+        one of FOUND, NOT_FOUND, ERROR or TIMEOUT
+    """
+    deadline = time.monotonic() + deadline_seconds
+
+    # Set for a variant once a preferred one has found a location (or the
+    # lookup is over), so it neither takes a rate limiter slot nor goes upstream
+    not_needed = [threading.Event() for _ in queries]
+
+    def lookup(position, query):
+        if rate_limiter is not None and not rate_limiter.acquire(deadline, not_needed[position]):
+            return None if not_needed[position].is_set() else _DEADLINE_PASSED
+        if not_needed[position].is_set():
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return _DEADLINE_PASSED
+        location = geocoder.geocode(query, timeout=min(request_timeout, remaining))
+        if not location:
+            return None
+        for event in not_needed[position + 1:]:
+            event.set()
+        return (location.latitude, location.longitude)
+
+    futures = [executor.submit(lookup, position, query) for position, query in enumerate(queries)]
+    timed_out = False
+    failed = False
+
+    try:
+        for query, future in zip(queries, futures):
+            try:
+                result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                timed_out = True
+                continue
+            except Exception as e:
+                print(f"Geocoding failed for {query}: {e}")
+                failed = True
+                continue
+
+            if result is _DEADLINE_PASSED:
+                timed_out = True
+            elif result:
+                return result, FOUND
+    finally:
+        # Drop variants that have not started; waiting ones give up their
+        # rate limiter slot and requests in flight finish in the background
+        for event in not_needed:
+            event.set()
+        for future in futures:
+            future.cancel()
+
+    if timed_out:
+        return None, TIMEOUT
+    return None, ERROR if failed else NOT_FOUND
@@ -0,0 +1,238 @@
+"""
+Lightweight timing and counter instrumentation for the search pipeline.
+Pipeline stages are timed with a monotonic clock and events (geocoder calls,
+cache hits, hospitals scanned) are counted into process-wide totals, exported
+as Prometheus text, and into the trace of the request being served. While
+metrics are disabled and no trace is active, an instrumentation point costs
+one flag check.
+"""
+
+import functools
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+# Set to 1 to collect process-wide metrics from startup
+METRICS_ENV = "HOSPITAL_FINDER_METRICS"
+
+# Optional file the app rewrites with the Prometheus export after each rerun
+METRICS_FILE = os.environ.get("HOSPITAL_FINDER_METRICS_FILE") or None
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "hospital_finder"
+
+_enabled = os.environ.get(METRICS_ENV, "") == "1"
+_lock = threading.Lock()
+
+# Process-wide totals: stage -> [count, total seconds, max seconds], and
+# counter -> value
+_stage_totals = {}
+_counters = {}
+
+# Trace of the request being served in this thread or task, or None
+_current_trace = ContextVar("metrics_trace", default=None)
+
+
+def enable_metrics(enabled=True):
+    """Turn process-wide metric collection on or off"""
+    global _enabled
+    _enabled = enabled
+
+
+def metrics_enabled():
+    """Check if process-wide metrics are being collected"""
+    return _enabled
+
+
+def reset_metrics():
+    """Clear the process-wide totals"""
+    with _lock:
+        _stage_totals.clear()
+        _counters.clear()
+
+
+def _record(stage, seconds, trace):
+    if _enabled:
+        with _lock:
+            totals = _stage_totals.get(stage)
+            if totals is None:
+                _stage_totals[stage] = [1, seconds, seconds]
+            else:
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] = max(totals[2], seconds)
+    if trace is not None:
+        trace['stages'][stage] = trace['stages'].get(stage, 0.0) + seconds
+
+
+class _StageTimer:
+    """Times one run of a stage, as a context manager or with start/stop"""
+
+    __slots__ = ('stage', 'trace', 'started')
+
+    def __init__(self, stage, trace):
+        self.stage = stage
+        self.trace = trace
+        self.started = time.perf_counter()
+
+    def stop(self):
+        """Record the time since the timer started"""
+        _record(self.stage, time.perf_counter() - self.started, self.trace)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+class _NullTimer:
+    """Timer handed out while nothing is collected"""
+
+    __slots__ = ()
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def start_timer(stage):
+    """
+    Start timing a pipeline stage.
+
+    Use the result as a context manager, or call its stop() method where
+    the stage ends.
+
+    Args:
+        stage: Stage name, e.g. 'geocode' or 'sort'
+    """
+    trace = _current_trace.get()
+    if not _enabled and trace is None:
+        return _NULL_TIMER
+    return _StageTimer(stage, trace)
+
+
+def timed(stage):
+    """Decorator timing every call of a function as a pipeline stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if not _enabled and trace is None:
+                return func(*args, **kwargs)
+            with _StageTimer(stage, trace):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(counter, amount=1):
+    """
+    Add to a counter.
+
+    Args:
+        counter: Counter name, e.g. 'geocoder_calls'
+        amount: Amount to add
+    """
+    trace = _current_trace.get()
+    if not _enabled and trace is None:
+        return
+    if _enabled:
+        with _lock:
+            _counters[counter] = _counters.get(counter, 0) + amount
+    if trace is not None:
+        trace['counters'][counter] = trace['counters'].get(counter, 0) + amount
+
+
+def start_trace(name=None):
+    """
+    Start collecting the stage times and counters of one request.
+
+    Tracing works whether or not process-wide metrics are enabled. The
+    trace belongs to the current thread (or async task) until finish_trace.
+
+    Returns:
+        Trace dictionary with 'name', 'stages' (stage -> seconds),
+        'counters' (counter -> value) and, once finished, 'total_seconds'
+    """
+    trace = {'name': name, 'stages': {}, 'counters': {}, 'total_seconds': None,
+             '_started': time.perf_counter()}
+    _current_trace.set(trace)
+    return trace
+
+
+def finish_trace(trace):
+    """Stop collecting into a trace and record its total time"""
+    trace['total_seconds'] = time.perf_counter() - trace.pop('_started')
+    if _current_trace.get() is trace:
+        _current_trace.set(None)
+    return trace
+
+
+def get_current_trace():
+    """Get the trace being collected in this thread or task, or None"""
+    return _current_trace.get()
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def export_prometheus():
+    """
+    Render the process-wide totals in the Prometheus text exposition format.
+
+    Returns:
+        String with a seconds summary and a max gauge per stage, and one
+        counter per event counter
+    """
+    with _lock:
+        stages = {stage: list(totals) for stage, totals in _stage_totals.items()}
+        counters = dict(_counters)
+
+    lines = []
+    if stages:
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent in each search pipeline stage.")
+        lines.append(f"# TYPE {name} summary")
+        for stage, (count, total, _) in sorted(stages.items()):
+            lines.append(f'{name}_sum{{stage="{stage}"}} {_format_value(total)}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        name = f"{METRIC_PREFIX}_stage_max_seconds"
+        lines.append(f"# HELP {name} Slowest single run of each search pipeline stage.")
+        lines.append(f"# TYPE {name} gauge")
+        for stage, (_, _, longest) in sorted(stages.items()):
+            lines.append(f'{name}{{stage="{stage}"}} {_format_value(longest)}')
+
+    for counter, value in sorted(counters.items()):
+        name = f"{METRIC_PREFIX}_{counter}_total"
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def write_prometheus_textfile(path):
+    """
+    Write the Prometheus export to a file, replacing it atomically, for
+    node_exporter's textfile collector or similar scrapers.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(export_prometheus())
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Could not write metrics to {path}: {e}")
@@ -0,0 +1,202 @@
+"""
+Sharded, multi-process hospital scoring for large hospital registries.
+The store is split into latitude bands, every worker process of a pool loads
+all shards once, and a search scores only the shards its search area
+overlaps, in parallel, merging the per-shard top results.
+"""
+
+import atexit
+import heapq
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from data.hospitals import HospitalStore, register_reload_hook
+from utils.ai_matcher import prepare_store, rank_hospitals
+from utils.spatial_index import search_bounds
+
+# Stores smaller than this are always scored serially, since shipping the
+# search to worker processes would cost more than scoring it
+PARALLEL_MIN_HOSPITALS = 50000
+
+# Shards per worker process; more shards let small searches skip more data
+SHARDS_PER_WORKER = 4
+
+# Shard stores loaded in a worker process by _load_shards
+_worker_shards = []
+
+
+def _load_shards(shard_records):
+    """Pool initializer: build and prepare every shard store once per worker"""
+    global _worker_shards
+    _worker_shards = [HospitalStore(records) for records in shard_records]
+    for store in _worker_shards:
+        prepare_store(store)
+
+
+def _rank_shard(shard_id, condition, user_coordinates, hospital_types, min_rating,
+                max_distance, top_k):
+    """Worker task: rank the hospitals of one shard"""
+    return rank_hospitals(
+        condition, user_coordinates, hospital_types, min_rating, max_distance,
+        _worker_shards[shard_id], top_k
+    )
+
+
+class ShardedScorer:
+    """
+    Process pool scoring searches over latitude-band shards of a store.
+
+    Each shard holds the rows of one band in ascending row order, so ranking
+    ties inside a shard are broken exactly as in a serial search and the
+    merged results equal those of rank_hospitals on the whole store.
+    """
+
+    def __init__(self, store, max_workers=None, shard_count=None):
+        self.store = store
+        self.max_workers = max_workers or os.cpu_count() or 1
+        shard_count = shard_count or self.max_workers * SHARDS_PER_WORKER
+
+        # Hospitals without coordinates can never be within a search radius
+        located = np.flatnonzero(np.isfinite(store.latitude) & np.isfinite(store.longitude))
+        by_latitude = located[np.argsort(store.latitude[located], kind='stable')]
+        self.shard_rows = [
+            np.sort(rows) for rows in np.array_split(by_latitude, shard_count) if len(rows)
+        ]
+        self.shard_bounds = [
+            (store.latitude[rows].min(), store.latitude[rows].max(),
+             store.longitude[rows].min(), store.longitude[rows].max())
+            for rows in self.shard_rows
+        ]
+
+        shard_records = [[store.records[row] for row in rows] for rows in self.shard_rows]
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_load_shards, initargs=(shard_records,)
+        )
+
+    def _overlapping_shards(self, center, radius_km):
+        """Get the ids of the shards whose bounding box meets the search box"""
+        bounds = search_bounds(center, radius_km)
+        crosses_antimeridian = bounds['lng_min'] < -180 or bounds['lng_max'] > 180
+        return [
+            shard_id
+            for shard_id, (lat_min, lat_max, lng_min, lng_max) in enumerate(self.shard_bounds)
+            if lat_min <= bounds['lat_max'] and lat_max >= bounds['lat_min'] and (
+                crosses_antimeridian or
+                (lng_min <= bounds['lng_max'] and lng_max >= bounds['lng_min'])
+            )
+        ]
+
+    def rank(self, condition, user_coordinates, hospital_types, min_rating, max_distance,
+             top_k=None):
+        """
+        Rank hospitals like rank_hospitals, scoring shards in parallel.
+
+        Returns:
+            List of (store row, distance, ScoreBreakdown) tuples, best first
+        """
+        shard_ids = self._overlapping_shards(user_coordinates, max_distance)
+        if len(shard_ids) <= 1:
+            return rank_hospitals(
+                condition, user_coordinates, hospital_types, min_rating, max_distance,
+                self.store, top_k
+            )
+
+        try:
+            futures = [
+                (shard_id, self._executor.submit(
+                    _rank_shard, shard_id, condition, user_coordinates, hospital_types,
+                    min_rating, max_distance, top_k
+                ))
+                for shard_id in shard_ids
+            ]
+        except RuntimeError:
+            # The pool was closed after a data reload; searches still holding
+            # the old store finish serially
+            return rank_hospitals(
+                condition, user_coordinates, hospital_types, min_rating, max_distance,
+                self.store, top_k
+            )
+
+        rankings = []
+        for shard_id, future in futures:
+            rows = self.shard_rows[shard_id]
+            rankings.extend(
+                (int(rows[shard_row]), distance, scores)
+                for shard_row, distance, scores in future.result()
+            )
+
+        # Serial ranking order: AI score and rating, then distance and row
+        rank_key = lambda x: (-x[2].ai_score, -self.store.rating[x[0]], x[1], x[0])
+        if top_k is not None:
+            return heapq.nsmallest(top_k, rankings, key=rank_key)
+        return sorted(rankings, key=rank_key)
+
+    def close(self):
+        """Shut down the worker processes once their submitted work is done"""
+        self._executor.shutdown(wait=False)
+
+
+# Scorers by (store id, worker count); each holds its store, so ids are not
+# reused while it is here. Created and dropped under the lock, and only closed
+# once their store is no longer the loaded one.
+_scorers = {}
+_scorers_lock = threading.Lock()
+
+
+def rank_hospitals_parallel(condition, user_coordinates, hospital_types, min_rating, max_distance,
+                            store, top_k=None, max_workers=None):
+    """
+    Rank hospitals with a process pool when the store is large enough.
+
+    Small stores, searches without coordinates and machines with a single
+    core fall back to the serial rank_hospitals. The pool is created on
+    first use for each store and worker count, and closed when the hospital
+    data is reloaded.
+
+    Args:
+        condition: Medical condition string
+        user_coordinates: Tuple of (latitude, longitude), or None
+        hospital_types: List of preferred hospital types
+        min_rating: Minimum hospital rating
+        max_distance: Maximum distance in kilometers
+        store: HospitalStore to search
+        top_k: Only return the k best hospitals
+        max_workers: Worker processes (defaults to the CPU count)
+
+    Returns:
+        List of (store row, distance, ScoreBreakdown) tuples, best first
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if len(store) < PARALLEL_MIN_HOSPITALS or user_coordinates is None or workers <= 1:
+        return rank_hospitals(
+            condition, user_coordinates, hospital_types, min_rating, max_distance, store, top_k
+        )
+
+    key = (id(store), workers)
+    with _scorers_lock:
+        scorer = _scorers.get(key)
+        if scorer is None:
+            scorer = _scorers[key] = ShardedScorer(store, workers)
+
+    return scorer.rank(
+        condition, user_coordinates, hospital_types, min_rating, max_distance, top_k
+    )
+
+
+def _close_stale_scorers(store):
+    """Reload hook: close the scorers of every store but the new one"""
+    with _scorers_lock:
+        stale = [key for key, scorer in _scorers.items() if scorer.store is not store]
+        for key in stale:
+            _scorers.pop(key).close()
+
+register_reload_hook(_close_stale_scorers)
+
+
+@atexit.register
+def _close_scorers():
+    with _scorers_lock:
+        for scorer in _scorers.values():
+            scorer.close()
+        _scorers.clear()
@@ -0,0 +1,211 @@
+"""
+Cost-based planner for hospital radius searches.
+The cheap row predicates (hospital type, minimum rating and a bounding box
+around the user) are estimated from per-store column statistics and applied
+in order of cost per dropped row, so the exact distance calculation only
+runs on the hospitals that pass all of them.
+"""
+
+from collections import namedtuple
+import numpy as np
+from utils.distance import distances_within, is_within_bounds
+from utils.metrics import increment
+from utils.spatial_index import search_bounds
+
+# Relative cost of checking one row against each predicate
+PREDICATE_COSTS = {
+    'type': 1.0,
+    'rating': 1.0,
+    'bbox': 2.0
+}
+
+# Planned search: query parameters plus the stage order. Searches without a
+# center skip the bounding box and distance stages, and searches answered from
+# a precomputed distance table start with a 'distance_table' stage instead.
+QueryPlan = namedtuple('QueryPlan', [
+    'center', 'radius_km', 'hospital_types', 'min_rating', 'bounds',
+    'stages', 'selectivity', 'distance_table'
+])
+
+
+def _column_statistics(store):
+    """Get the per-store column statistics used for selectivity estimates"""
+    def build(s):
+        return {
+            'type_counts': np.bincount(s.type_code, minlength=len(s.types)),
+            'ratings': np.sort(s.rating),
+            'latitudes': np.sort(s.latitude[np.isfinite(s.latitude)]),
+            'longitudes': np.sort(s.longitude[np.isfinite(s.longitude)])
+        }
+    return store.derived('planner_statistics', build)
+
+
+def _fraction_between(sorted_values, low, high, total):
+    """Fraction of total whose value lies in [low, high]"""
+    start = np.searchsorted(sorted_values, low, side='left')
+    end = np.searchsorted(sorted_values, high, side='right')
+    return max(0, int(end - start)) / total
+
+
+def _within_search_bounds(bounds, latitudes, longitudes):
+    """Vectorized bounding box check that follows boxes across the antimeridian"""
+    inside = is_within_bounds((latitudes, longitudes), bounds)
+    if bounds['lng_min'] < -180:
+        inside |= is_within_bounds((latitudes, longitudes - 360), bounds)
+    if bounds['lng_max'] > 180:
+        inside |= is_within_bounds((latitudes, longitudes + 360), bounds)
+    return inside
+
+
+def estimate_selectivity(store, hospital_types, min_rating, bounds=None):
+    """
+    Estimate the fraction of hospitals each predicate keeps.
+
+    Args:
+        store: HospitalStore to search
+        hospital_types: Hospital type names to accept
+        min_rating: Minimum hospital rating
+        bounds: Bounding box from search_bounds, or None for no box
+
+    Returns:
+        Dictionary of predicate name to estimated fraction kept (0 to 1)
+    """
+    statistics = _column_statistics(store)
+    total = max(len(store), 1)
+
+    type_codes = [code for code, name in enumerate(store.types.names) if name in hospital_types]
+    selectivity = {
+        'type': float(statistics['type_counts'][type_codes].sum()) / total,
+        'rating': _fraction_between(statistics['ratings'], min_rating, np.inf, total)
+    }
+
+    if bounds is not None:
+        # Latitude and longitude are assumed independent
+        lng_fraction = 0.0
+        for shift in (0, -360, 360):
+            lng_fraction += _fraction_between(
+                statistics['longitudes'], bounds['lng_min'] + shift, bounds['lng_max'] + shift, total
+            )
+        lat_fraction = _fraction_between(
+            statistics['latitudes'], bounds['lat_min'], bounds['lat_max'], total
+        )
+        selectivity['bbox'] = lat_fraction * min(1.0, lng_fraction)
+
+    return selectivity
+
+
+def plan_query(store, center, radius_km, hospital_types, min_rating, distance_table=None):
+    """
+    Choose the order in which to apply the search predicates.
+
+    Predicates are ordered by cost per dropped row, so cheap and selective
+    filters run first and shrink the input of the later ones. The exact
+    distance check always runs last. If a distance table covers the center
+    and radius, the search starts from its precomputed distances instead and
+    needs neither the bounding box nor the distance check.
+
+    Args:
+        store: HospitalStore to search
+        center: Tuple of (latitude, longitude), or None if unknown
+        radius_km: Search radius in kilometers
+        hospital_types: Hospital type names to accept
+        min_rating: Minimum hospital rating
+        distance_table: Optional DistanceTable over the store
+
+    Returns:
+        QueryPlan
+    """
+    use_table = distance_table is not None and distance_table.covers(center, radius_km)
+    bounds = search_bounds(center, radius_km) if center is not None and not use_table else None
+    selectivity = estimate_selectivity(store, hospital_types, min_rating, bounds)
+
+    def cost_per_dropped_row(name):
+        dropped = 1.0 - selectivity[name]
+        return PREDICATE_COSTS[name] / dropped if dropped > 0 else np.inf
+
+    stages = sorted(selectivity, key=cost_per_dropped_row)
+    if use_table:
+        stages.insert(0, 'distance_table')
+    elif center is not None:
+        stages.append('distance')
+
+    return QueryPlan(
+        center=center, radius_km=radius_km, hospital_types=hospital_types,
+        min_rating=min_rating, bounds=bounds, stages=stages, selectivity=selectivity,
+        distance_table=distance_table if use_table else None
+    )
+
+
+def execute_plan(plan, store, index=None, stats=None):
+    """
+    Run a query plan against a hospital store.
+
+    Args:
+        plan: QueryPlan from plan_query
+        store: HospitalStore the plan was made for
+        index: Optional GeoGridIndex over the store, used to find the
+            bounding box candidates when that predicate runs first
+        stats: Optional dictionary; receives the stage order under 'plan'
+            and per-stage candidate and drop counts under 'stages'
+
+    Returns:
+        List of (row, distance) tuples. With a center they are the hospitals
+        within the radius sorted by distance (ties in row order); without one
+        every hospital passing the filters in row order, with distance None.
+    """
+    rows = None  # None stands for every row of the store
+    distances = None
+    stage_stats = []
+
+    for name in plan.stages:
+        candidates = len(store) if rows is None else len(rows)
+        if name == 'distance_table':
+            # Rows come out sorted by distance, with ties in row order
+            rows, distances = plan.distance_table.lookup(plan.center, plan.radius_km)
+            increment('distance_table_hits')
+        else:
+            if name == 'bbox' and rows is None and index is not None:
+                # The grid only returns rows in cells overlapping the box
+                rows = index.candidates(plan.center, plan.radius_km)
+            elif rows is None:
+                rows = np.arange(len(store))
+
+            if name == 'distance':
+                within, distances = distances_within(
+                    plan.center, store.latitude[rows], store.longitude[rows], plan.radius_km
+                )
+                rows = rows[within]
+            else:
+                if name == 'type':
+                    keep = store.type_mask(plan.hospital_types, rows)
+                elif name == 'rating':
+                    keep = store.rating[rows] >= plan.min_rating
+                else:
+                    keep = _within_search_bounds(
+                        plan.bounds, store.latitude[rows], store.longitude[rows]
+                    )
+                rows = rows[keep]
+                if distances is not None:
+                    distances = distances[keep]
+
+        stage_stats.append({
+            'stage': name,
+            'estimated_selectivity': plan.selectivity.get(name),
+            'candidates': candidates,
+            'dropped': candidates - len(rows)
+        })
+
+    if rows is None:
+        rows = np.arange(len(store))
+
+    if stats is not None:
+        stats['plan'] = list(plan.stages)
+        stats['stages'] = stage_stats
+
+    if distances is None:
+        return [(int(row), None) for row in rows]
+
+    # Rows are either ascending or already in table order, so a stable sort
+    # keeps ties in row order
+    order = np.argsort(distances, kind='stable')
+    return [(int(rows[i]), float(distances[i])) for i in order]
@@ -0,0 +1,297 @@
+"""
+Spatial index over hospital coordinates for radius and nearest-neighbour search.
+Hospitals are bucketed into a fixed latitude/longitude grid once at load time,
+so a query only measures the hospitals in grid cells overlapping its search area.
+"""
+
+import math
+import numpy as np
+from utils.distance import distances_within
+
+# Grid cell size in degrees (roughly 28 km of latitude)
+DEFAULT_CELL_SIZE = 0.25
+
+# Lower bounds for the length of one degree on the WGS-84 ellipsoid. Using
+# lower bounds keeps the cell window of a query a superset of the true circle.
+MIN_KM_PER_LAT_DEGREE = 110.5
+MIN_KM_PER_LNG_DEGREE_AT_EQUATOR = 111.3
+
+# Slack added to every search radius so that distances which round down onto
+# the radius (calculate_distance rounds to 2 decimals) are never missed
+RADIUS_SLACK_KM = 0.01
+
+# Largest possible distance between two points on Earth
+MAX_SEARCH_RADIUS_KM = 20040
+
+# Default reach of a DistanceTable (the app's largest distance setting)
+DEFAULT_TABLE_RADIUS_KM = 100
+
+
+def search_bounds(center, radius_km):
+    """
+    Get a latitude/longitude box guaranteed to contain a search circle.
+
+    Unlike calculate_area_coverage, which uses a rough 111 km per degree,
+    the box is built from lower bounds on the degree lengths, so no point
+    within the radius falls outside it.
+
+    Args:
+        center: Tuple of (latitude, longitude)
+        radius_km: Search radius in kilometers
+
+    Returns:
+        Dictionary with lat_min, lat_max, lng_min and lng_max; longitudes
+        extend past +/-180 when the box crosses the antimeridian
+    """
+    lat, lng = center
+    radius_km = radius_km + RADIUS_SLACK_KM
+
+    lat_range = radius_km / MIN_KM_PER_LAT_DEGREE
+    lat_min = max(-90.0, lat - lat_range)
+    lat_max = min(90.0, lat + lat_range)
+
+    # Longitude degrees are shortest at the latitude furthest from the equator
+    widest_lat = max(abs(lat_min), abs(lat_max))
+    lng_degree_km = MIN_KM_PER_LNG_DEGREE_AT_EQUATOR * math.cos(math.radians(widest_lat))
+    if lng_degree_km <= 0 or radius_km / lng_degree_km >= 180:
+        lng_min, lng_max = -180.0, 180.0
+    else:
+        lng_range = radius_km / lng_degree_km
+        lng_min, lng_max = lng - lng_range, lng + lng_range
+
+    return {"lat_min": lat_min, "lat_max": lat_max, "lng_min": lng_min, "lng_max": lng_max}
+
+
+class GeoGridIndex:
+    """
+    Latitude/longitude grid index over a fixed set of points.
+
+    Points are kept sorted by cell key, so each grid row covered by a query
+    maps to one contiguous slice that is found with a binary search.
+    Point ids are positions in the sequence the index was built from.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+
+        valid = np.isfinite(self.latitudes) & np.isfinite(self.longitudes)
+        ids = np.nonzero(valid)[0]
+
+        self._n_cols = int(math.ceil(360 / cell_size)) + 1
+        self._n_rows = int(math.ceil(180 / cell_size)) + 1
+        keys = self._cell_keys(self.latitudes[ids], self.longitudes[ids])
+
+        order = np.argsort(keys, kind="stable")
+        self._ids = ids[order]
+        self._keys = keys[order]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _cell_rows(self, latitudes):
+        rows = np.floor((np.asarray(latitudes) + 90) / self.cell_size).astype(np.int64)
+        return np.clip(rows, 0, self._n_rows - 1)
+
+    def _cell_cols(self, longitudes):
+        cols = np.floor((np.asarray(longitudes) + 180) / self.cell_size).astype(np.int64)
+        return np.clip(cols, 0, self._n_cols - 1)
+
+    def _cell_keys(self, latitudes, longitudes):
+        return self._cell_rows(latitudes) * self._n_cols + self._cell_cols(longitudes)
+
+    def candidates(self, center, radius_km):
+        """
+        Get ids of all points in grid cells that may lie within a radius.
+
+        Args:
+            center: Tuple of (latitude, longitude)
+            radius_km: Search radius in kilometers
+
+        Returns:
+            Sorted NumPy array of point ids (a superset of the true matches)
+        """
+        bounds = search_bounds(center, radius_km)
+        lng_min, lng_max = bounds['lng_min'], bounds['lng_max']
+
+        row_min, row_max = self._cell_rows([bounds['lat_min'], bounds['lat_max']])
+        col_min, col_max = self._cell_cols([lng_min, lng_max])
+        col_ranges = [(col_min, col_max)]
+        # Search windows crossing the antimeridian wrap around to the other side
+        if lng_min < -180:
+            col_ranges.append((self._cell_cols(lng_min + 360), self._n_cols - 1))
+        if lng_max > 180:
+            col_ranges.append((0, self._cell_cols(lng_max - 360)))
+
+        slices = []
+        for row in range(row_min, row_max + 1):
+            for first_col, last_col in col_ranges:
+                start = np.searchsorted(self._keys, row * self._n_cols + first_col, side="left")
+                end = np.searchsorted(self._keys, row * self._n_cols + last_col, side="right")
+                if end > start:
+                    slices.append(self._ids[start:end])
+
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(slices))
+
+    def query_radius(self, center, radius_km, approximate=True):
+        """
+        Find all points within a radius of a location.
+
+        Args:
+            center: Tuple of (latitude, longitude)
+            radius_km: Search radius in kilometers
+            approximate: Rule out points clearly outside the radius with a
+                cheap estimate before measuring exact distances
+
+        Returns:
+            List of (point id, distance in km) tuples sorted by distance,
+            with ties kept in original order
+        """
+        candidate_ids = self.candidates(center, radius_km)
+        within, distances = distances_within(
+            center, self.latitudes[candidate_ids], self.longitudes[candidate_ids],
+            radius_km, approximate
+        )
+        candidate_ids = candidate_ids[within]
+
+        # Candidate ids are ascending, so a stable sort keeps ties in original order
+        order = np.argsort(distances, kind="stable")
+        return [(int(candidate_ids[i]), float(distances[i])) for i in order]
+
+    def query_expanding(self, center, radius_km, k, max_radius_km=MAX_SEARCH_RADIUS_KM,
+                        eligible=None, approximate=True):
+        """
+        Find all points within a radius, widening it until k points qualify.
+
+        The radius doubles until at least k qualifying points lie within it
+        or it reaches max_radius_km.
+
+        Args:
+            center: Tuple of (latitude, longitude)
+            radius_km: Initial search radius in kilometers
+            k: Number of qualifying points wanted
+            max_radius_km: Hard cap on the search radius in kilometers
+            eligible: Optional boolean array over point ids; other points
+                are left out of the results
+            approximate: Passed on to query_radius
+
+        Returns:
+            Tuple of (list of (point id, distance in km) tuples sorted by
+            distance, smallest searched radius in kilometers holding them)
+        """
+        radius_used = radius_km
+        found = None
+        while True:
+            matches = self.query_radius(center, radius_km, approximate)
+            if eligible is not None:
+                matches = [match for match in matches if eligible[match[0]]]
+            if found is not None and len(matches) > found:
+                radius_used = radius_km
+            found = len(matches)
+            if len(matches) >= k or radius_km >= max_radius_km:
+                return matches, radius_used
+            radius_km = min(radius_km * 2, max_radius_km)
+
+    def query_nearest(self, center, k, max_radius_km=MAX_SEARCH_RADIUS_KM):
+        """
+        Find the k points nearest to a location.
+
+        The search radius starts at one grid cell and doubles until it holds
+        at least k points or reaches max_radius_km.
+
+        Args:
+            center: Tuple of (latitude, longitude)
+            k: Number of points to return
+            max_radius_km: Hard cap on the search radius in kilometers
+
+        Returns:
+            List of up to k (point id, distance in km) tuples sorted by distance
+        """
+        if k <= 0 or len(self) == 0:
+            return []
+
+        radius_km = min(self.cell_size * MIN_KM_PER_LAT_DEGREE, max_radius_km)
+        matches, _ = self.query_expanding(center, radius_km, k, max_radius_km)
+        return matches[:k]
+
+
+class DistanceTable:
+    """
+    Precomputed distances from a fixed set of origins to nearby points.
+
+    For each origin, the ids of the points within radius_km are kept sorted
+    by distance (ties in id order), so a query from that origin is a prefix
+    of its table. Tables are built on first use, or all at once with warm().
+    """
+
+    def __init__(self, index, origins, radius_km=DEFAULT_TABLE_RADIUS_KM):
+        self.index = index
+        self.radius_km = radius_km
+        self.origins = {(float(lat), float(lng)) for lat, lng in origins}
+        self._tables = {}
+
+    def _table(self, origin):
+        table = self._tables.get(origin)
+        if table is None:
+            matches = self.index.query_radius(origin, self.radius_km)
+            table = (np.array([point_id for point_id, _ in matches], dtype=np.int64),
+                     np.array([distance for _, distance in matches], dtype=float))
+            self._tables[origin] = table
+        return table
+
+    def covers(self, origin, radius_km):
+        """Check whether a query can be answered from the table"""
+        return (origin is not None and radius_km <= self.radius_km and
+                (float(origin[0]), float(origin[1])) in self.origins)
+
+    def lookup(self, origin, radius_km):
+        """
+        Get the points within a radius of a precomputed origin.
+
+        Args:
+            origin: Tuple of (latitude, longitude), one of the table's origins
+            radius_km: Search radius, at most the table's radius_km
+
+        Returns:
+            Tuple of (point ids, distances in km) arrays sorted by distance,
+            or None if the table does not cover the query
+        """
+        if not self.covers(origin, radius_km):
+            return None
+        point_ids, distances = self._table((float(origin[0]), float(origin[1])))
+        end = np.searchsorted(distances, radius_km, side="right")
+        return point_ids[:end], distances[:end]
+
+    def warm(self):
+        """Build the table of every origin now"""
+        for origin in self.origins:
+            self._table(origin)
+
+
+def build_spatial_index(hospitals, cell_size=DEFAULT_CELL_SIZE):
+    """
+    Build a spatial index over a list of hospitals.
+
+    Hospitals without usable coordinates are left out of the index.
+
+    Args:
+        hospitals: List of hospital dictionaries with latitude and longitude
+        cell_size: Grid cell size in degrees
+
+    Returns:
+        GeoGridIndex whose point ids are positions in the hospitals list
+    """
+    latitudes = []
+    longitudes = []
+    for hospital in hospitals:
+        try:
+            latitudes.append(float(hospital['latitude']))
+            longitudes.append(float(hospital['longitude']))
+        except (KeyError, TypeError, ValueError):
+            latitudes.append(math.nan)
+            longitudes.append(math.nan)
+
+    return GeoGridIndex(latitudes, longitudes, cell_size)
@@ -0,0 +1,153 @@
+"""
+Materialized specialty match scores for the known medical conditions.
+Scores every known condition against every hospital once when the hospital
+data loads, so scoring a known condition at query time is a gather from a
+compact code matrix instead of nested specialty comparisons.
+"""
+
+import numpy as np
+from data.specialties import LEVEL_WEIGHTS, SPECIALTIES, get_store_specialty_ids
+
+_LEVEL_WEIGHTS = np.array(LEVEL_WEIGHTS, dtype=float)
+
+
+def scores_from_levels(levels):
+    """
+    Turn match levels into specialty match scores.
+
+    Args:
+        levels: Levels from SpecialtyRegistry.first_match_levels, one row per
+            required specialty (at least one) and one column per hospital
+
+    Returns:
+        float64 array with the score of each hospital, equal to what
+        score_specialties returns
+    """
+    # Summed row by row, in the same order as score_specialties; numpy's
+    # pairwise summation could round differently for long specialty lists
+    match_count = np.zeros(levels.shape[1])
+    for weights in _LEVEL_WEIGHTS[levels]:
+        match_count += weights
+    return np.clip(match_count / len(levels) * 100, 0, 100)
+
+
+class SpecialtyScoreMatrix:
+    """
+    Condition x hospital matrix of specialty match scores.
+
+    Scores are held as uint8 codes into a palette of the distinct float64
+    scores, so a gathered score is exactly the value score_specialties
+    returns. Levels and scores are computed once per distinct hospital
+    specialty list and only the codes are spread to every row; a matrix
+    built with a previous one reuses its levels, so reloading hospital data
+    only matches new specialty lists.
+    """
+
+    def __init__(self, store, condition_specialties, previous=None):
+        self.conditions = {}
+        for specialties in condition_specialties:
+            if specialties:
+                self.conditions.setdefault(tuple(specialties), len(self.conditions))
+
+        # Specialties required by any known condition, in first-seen order
+        self.specialties = list(dict.fromkeys(
+            specialty for specialties in self.conditions for specialty in specialties
+        ))
+        required_ids = SPECIALTIES.intern_all(self.specialties)
+
+        reusable = {}
+        if previous is not None and previous.specialties == self.specialties:
+            reusable = previous._levels_by_specialties
+
+        # Rows sharing a specialty list share one column of levels and scores
+        columns = {}
+        column_of_row = np.fromiter(
+            (columns.setdefault(tuple(hospital.get('specialties', [])), len(columns))
+             for hospital in store.records),
+            dtype=np.int64, count=len(store)
+        )
+        column_rows = np.zeros(len(columns), dtype=np.int64)
+        column_rows[column_of_row[::-1]] = np.arange(len(store))[::-1]  # First row of each
+
+        self._levels_by_specialties = {}
+        missing = []
+        for column, specialties in enumerate(columns):
+            if specialties in reusable:
+                self._levels_by_specialties[specialties] = reusable[specialties]
+            else:
+                missing.append(column)
+
+        if missing:
+            specialty_lists = list(columns)
+            hospital_ids, offsets = _gather_segments(
+                get_store_specialty_ids(store), store.specialty_offsets, column_rows[missing]
+            )
+            new_levels = SPECIALTIES.first_match_levels(required_ids, hospital_ids, offsets)
+            for position, column in enumerate(missing):
+                self._levels_by_specialties[specialty_lists[column]] = new_levels[:, position]
+
+        levels = np.zeros((len(self.specialties), len(columns)), dtype=np.uint8)
+        for column, specialties in enumerate(columns):
+            levels[:, column] = self._levels_by_specialties[specialties]
+
+        # Scored per distinct specialty list, then spread to the rows as codes
+        scores = np.zeros((len(self.conditions), len(columns)))
+        specialty_positions = {specialty: i for i, specialty in enumerate(self.specialties)}
+        for specialties, condition_row in self.conditions.items():
+            scores[condition_row] = scores_from_levels(
+                levels[[specialty_positions[s] for s in specialties]]
+            )
+
+        self.palette, codes = np.unique(scores, return_inverse=True)
+        code_dtype = np.uint8 if len(self.palette) <= 256 else np.uint16
+        column_codes = codes.reshape(scores.shape).astype(code_dtype)
+        self.codes = column_codes[:, column_of_row]
+
+    def scores(self, required_specialties, rows=None):
+        """
+        Get the specialty match scores of a condition.
+
+        Args:
+            required_specialties: Resolved specialties of the condition
+            rows: Store rows to score (defaults to every row)
+
+        Returns:
+            float64 array of scores aligned with rows, or None if the
+            specialties are not those of a known condition
+        """
+        condition_row = self.conditions.get(tuple(required_specialties))
+        if condition_row is None:
+            return None
+        codes = self.codes[condition_row]
+        return self.palette[codes if rows is None else codes[rows]]
+
+
+def _gather_segments(values, offsets, rows):
+    """Get the flattened values and offsets of a subset of CSR rows"""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    sub_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    positions = np.repeat(starts - sub_offsets[:-1], lengths) + np.arange(sub_offsets[-1])
+    return values[positions], sub_offsets
+
+
+def score_rows(store, required_specialties, rows):
+    """
+    Compute specialty match scores of any condition for some store rows.
+
+    Args:
+        store: HospitalStore to score
+        required_specialties: Resolved specialties of the condition (at least one)
+        rows: Store rows to score
+
+    Returns:
+        float64 array of scores aligned with rows
+    """
+    hospital_ids, offsets = _gather_segments(
+        get_store_specialty_ids(store), store.specialty_offsets, rows
+    )
+    levels = SPECIALTIES.first_match_levels(
+        SPECIALTIES.intern_all(required_specialties), hospital_ids, offsets
+    )
+    return scores_from_levels(levels)